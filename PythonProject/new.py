@@ -1,13 +1,49 @@
 import json
+import math
 import os
 import random
 import threading
 import time
 from tqdm import tqdm
-import pandas as pd
+from openpyxl import Workbook
+
+
+def multiset_count(counts):
+    """多重集合排列数 n! / (c1! c2! ...)，counts 为 {类型: 人数}"""
+    total = math.factorial(sum(counts.values()))
+    for c in counts.values():
+        total //= math.factorial(c)
+    return total
+
+
+def unrank_multiset(seed, counts):
+    """把种子（0 <= seed < multiset_count(counts)）映射为类型的多重集合排列（字典序）"""
+    remaining = {v: c for v, c in sorted(counts.items()) if c > 0}
+    total = multiset_count(remaining)
+    result = []
+    for left in range(sum(remaining.values()), 0, -1):
+        for value, c in remaining.items():
+            block = total * c // left
+            if seed < block:
+                break
+            seed -= block
+        result.append(value)
+        total = block
+        if c == 1:
+            del remaining[value]
+        else:
+            remaining[value] = c - 1
+    return result
+
+
+# 类型图案中空座位的编码
+EMPTY = 9
 
 
 class ClassroomArranger:
+    # 每个线程一次领取的连续种子数
+    CHUNK_SIZE = 1000
+
     def __init__(self, student_file="students.json"):
         self.student_file = student_file
         self.students = self.load_or_create_students()
@@ -17,7 +53,13 @@ class ClassroomArranger:
         self.lock = threading.Lock()
         self.result = None
         self.seed = None
-        self.max_attempts = self.n ** self.n
+        # 规则只与类型有关：种子枚举的是类型图案而不是 n! 个姓名排列
+        self.type_counts = {}
+        for student in self.students:
+            self.type_counts[student['type']] = self.type_counts.get(student['type'], 0) + 1
+        if self.rows * self.cols > self.n:
+            self.type_counts[EMPTY] = self.rows * self.cols - self.n
+        self.max_attempts = multiset_count(self.type_counts)
         self.attempts = 0
         self.progress = None
 
@@ -64,12 +106,35 @@ class ClassroomArranger:
         print(f"\n✅ 学生信息已保存至 {self.student_file}")
 
     def calculate_layout(self):
-        """计算教室行列布局"""
-        sqrt = int(self.n ** 0.5)
-        for i in range(sqrt, 0, -1):
-            if self.n % i == 0:
-                return i, self.n // i
-        return 1, self.n
+        """计算教室行列布局
+
+        在长宽比不超过1.5的矩形中按空座位从少到多、再按接近正方形的顺序依次尝试，
+        使用第一个不被计数上界否定的矩形；都被否定时使用 ceil(√n)×ceil(√n) 的正方形。
+        """
+        size = math.ceil(math.sqrt(self.n))
+        candidates = []
+        for rows in range(1, size + 1):
+            for cols in range(max(rows, math.ceil(self.n / rows)), size * size // rows + 1):
+                if cols / rows <= 1.5 and (rows, cols) != (size, size):
+                    candidates.append((rows * cols - self.n, cols / rows, rows, cols))
+        for _, _, rows, cols in sorted(candidates):
+            if self.layout_possible(rows, cols):
+                return rows, cols
+        return size, size
+
+    def layout_possible(self, rows, cols):
+        """计数上界：-2 周围一圈不能有问题学生，-1 前后左右不能有问题学生，问题学生需要好学生"""
+        counts = {}
+        for student in self.students:
+            counts[student['type']] = counts.get(student['type'], 0) + 1
+        negative = counts.get(-1, 0) + counts.get(-2, 0)
+        if negative and not counts.get(1):
+            return False
+        # -2 两两不相邻（含对角），每个 2×2 块最多一名
+        if counts.get(-2, 0) > -(-rows // 2) * -(-cols // 2):
+            return False
+        # 问题学生两两不能前后左右相邻，最多占棋盘格的一种颜色
+        return negative <= (rows * cols + 1) // 2
 
     def check_partial(self, grid, row, col):
         """逐步检查当前座位有效性"""
@@ -111,40 +176,52 @@ class ClassroomArranger:
         return True
 
     def generate_and_validate(self, seed):
-        """生成并验证排列"""
-        random.seed(seed)
-        shuffled = random.sample(self.students, self.n)
+        """生成并验证排列：种子先解码为类型图案（含空座位），验证通过后再填入姓名"""
+        pattern = unrank_multiset(seed, self.type_counts)
 
         grid = [[None for _ in range(self.cols)] for _ in range(self.rows)]
         idx = 0
 
         for i in range(self.rows):
             for j in range(self.cols):
-                if idx >= self.n:
-                    return grid
-
-                grid[i][j] = shuffled[idx]
-                if not self.check_partial(grid, i, j):
-                    return None
+                if pattern[idx] != EMPTY:
+                    grid[i][j] = {'type': pattern[idx]}
+                    if not self.check_partial(grid, i, j):
+                        return None
                 idx += 1
-        return grid
+        return self.assign_students(grid, seed)
+
+    def assign_students(self, grid, seed):
+        """同类型学生按种子打乱后依次填入类型图案"""
+        rng = random.Random(seed)
+        groups = {}
+        for student in self.students:
+            groups.setdefault(student['type'], []).append(student)
+        for group in groups.values():
+            rng.shuffle(group)
+        return [[groups[cell['type']].pop() if cell else None for cell in row] for row in grid]
 
     def worker(self):
-        """工作线程"""
+        """工作线程：每次加锁领取一段连续种子"""
         while not self.found_event.is_set():
             with self.lock:
                 if self.attempts >= self.max_attempts:
                     return
-                seed = self.attempts
-                self.attempts += 1
+                start = self.attempts
+                end = min(start + self.CHUNK_SIZE, self.max_attempts)
+                self.attempts = end
 
-            grid = self.generate_and_validate(seed)
-            if grid:
-                with self.lock:
-                    if not self.found_event.is_set():
-                        self.result = grid
-                        self.seed = seed
-                        self.found_event.set()
+            for seed in range(start, end):
+                if self.found_event.is_set():
+                    return
+                grid = self.generate_and_validate(seed)
+                if grid:
+                    with self.lock:
+                        if not self.found_event.is_set():
+                            self.result = grid
+                            self.seed = seed
+                            self.found_event.set()
+                    return
 
     def find_arrangement(self, thread_num=4):
         """主运行方法"""
@@ -182,19 +259,19 @@ class ClassroomArranger:
         if not self.result:
             raise ValueError("没有找到有效排列")
 
-        data = []
-        for row in self.result:
-            data_row = []
+        # 只写工作簿逐行写出，不在内存中保留单元格对象
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        sheet.append([""] + [f"第{i + 1}列" for i in range(self.cols)])
+        for row_idx, row in enumerate(self.result):
+            data_row = [f"第{row_idx + 1}行"]
             for student in row:
                 if student:
                     data_row.append(f"{student['name']} ({student['type']})")
                 else:
                     data_row.append("空座位")
-            data.append(data_row)
-
-        df = pd.DataFrame(data, columns=[f"第{i + 1}列" for i in range(self.cols)])
-        df.index = [f"第{i + 1}行" for i in range(self.rows)]
-        df.to_excel(filename, engine='openpyxl')
+            sheet.append(data_row)
+        workbook.save(filename)
         print(f"\n✅ 座位表已保存到 {os.path.abspath(filename)}")
 
 
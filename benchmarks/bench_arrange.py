@@ -0,0 +1,226 @@
+# bench_arrange.py
+"""排座引擎基准测试
+
+用固定种子生成不同人数（9–400人）和类型比例的模拟名单，分别运行
+ClassroomService.arrange 的各个引擎和 ClassroomArranger.find_arrangement，
+记录找到第一个解的时间、每秒候选数、峰值内存和成功率，结果保存为 JSON。
+
+用法示例：
+    python benchmarks/bench_arrange.py
+    python benchmarks/bench_arrange.py --sizes 36 45 100 --repeats 5
+    python benchmarks/bench_arrange.py --compare benchmarks/results/上次.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'new'))
+sys.path.insert(0, str(ROOT / 'PythonProject'))
+
+from new import ClassroomArranger
+from roster import Roster
+from service import ClassroomService
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+# 类型比例预设：(-2 比例, -1 比例, 1 比例)，其余为普通学生
+MIXES = {
+    'loose': (0.03, 0.10, 0.30),
+    'typical': (0.08, 0.15, 0.25),
+    'tight': (0.12, 0.25, 0.20),
+}
+DEFAULT_SIZES = (9, 16, 36, 45, 100, 400)
+DEFAULT_ENGINES = ('backtrack', 'anneal', 'arranger')
+
+
+def make_roster(n, mix, seed):
+    """按类型比例生成模拟名单（同一参数总是生成同一份名单）"""
+    serious, talk, good = MIXES[mix]
+    counts = {-2: round(n * serious), -1: round(n * talk), 1: round(n * good)}
+    if counts[-2] and not counts[1]:
+        counts[1] = 1
+    types = [t for t, c in counts.items() for _ in range(c)]
+    types += [0] * (n - len(types))
+    random.Random(seed).shuffle(types)
+    return [{'name': f"学生{i + 1}", 'type': t} for i, t in enumerate(types[:n])]
+
+
+def peak_rss_kb():
+    """当前进程的峰值常驻内存（KB），不支持的平台返回 None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _run_service(students, mode, seed, time_limit, workers):
+    service = ClassroomService()
+    service.students = Roster(students)
+    failures = service.analyze_feasibility()
+    if failures:
+        # 计数上界已证明无解，arrange 会直接报错，不计入耗时统计
+        return False, 0, {'infeasible': [f['bound'] for f in failures]}
+    timer = threading.Timer(time_limit, service.stop_event.set)
+    timer.start()
+    try:
+        result = service.arrange(seed, workers, lambda value: None, lambda message: None,
+                                 mode=mode, time_limit=time_limit)
+    finally:
+        timer.cancel()
+    ok = bool(result) and not result.get('violations')
+    snapshot = service.get_stats_snapshot()
+    return ok, snapshot['generated'], {'rejections': snapshot['rejections'],
+                                       'generation_seconds': snapshot['generation_seconds'],
+                                       'validation_seconds': snapshot['validation_seconds']}
+
+
+def _run_arranger(students, seed, time_limit, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'students.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(students, f, ensure_ascii=False)
+        arranger = ClassroomArranger(path)
+        # ClassroomArranger 按种子顺序枚举，用起始偏移区分重复运行
+        arranger.attempts = seed % arranger.max_attempts
+        timer = threading.Timer(time_limit, arranger.found_event.set)
+        timer.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                arranger.find_arrangement(thread_num=workers)
+        finally:
+            timer.cancel()
+        return arranger.result is not None, arranger.attempts - seed % arranger.max_attempts, {}
+
+
+def run_case(case):
+    """在独立的子进程中运行一个用例，保证峰值内存互不影响"""
+    students = make_roster(case['n'], case['mix'], case['seed'])
+    started = time.perf_counter()
+    if case['engine'] == 'arranger':
+        ok, candidates, extra = _run_arranger(students, case['seed'], case['time_limit'],
+                                              case['workers'])
+    else:
+        ok, candidates, extra = _run_service(students, case['engine'], case['seed'],
+                                      case['time_limit'], case['workers'])
+    elapsed = time.perf_counter() - started
+    return dict(case,
+                ok=ok,
+                seconds=round(elapsed, 6),
+                candidates=candidates,
+                candidates_per_sec=round(candidates / elapsed, 1) if candidates and elapsed else None,
+                peak_rss_kb=peak_rss_kb(),
+                **extra)
+
+
+def summarize(cases):
+    """按 引擎/人数/比例 汇总成功率和耗时"""
+    groups = {}
+    for case in cases:
+        groups.setdefault((case['engine'], case['n'], case['mix']), []).append(case)
+    summary = []
+    for (engine, n, mix), runs in groups.items():
+        solved = [r['seconds'] for r in runs if r['ok']]
+        rates = [r['candidates_per_sec'] for r in runs if r['candidates_per_sec']]
+        peaks = [r['peak_rss_kb'] for r in runs if r['peak_rss_kb']]
+        summary.append({
+            'engine': engine, 'n': n, 'mix': mix,
+            'runs': len(runs),
+            'infeasible': sum(1 for r in runs if r.get('infeasible')),
+            'success_rate': len(solved) / len(runs),
+            'median_seconds': statistics.median(solved) if solved else None,
+            'median_candidates_per_sec': statistics.median(rates) if rates else None,
+            'max_peak_rss_kb': max(peaks) if peaks else None,
+        })
+    return summary
+
+
+def compare(current, previous_path):
+    """与之前保存的结果对比中位耗时"""
+    with open(previous_path, encoding='utf-8') as f:
+        previous = {(s['engine'], s['n'], s['mix']): s for s in json.load(f)['summary']}
+    print(f"\n与 {previous_path} 对比（中位耗时）：")
+    for s in current:
+        old = previous.get((s['engine'], s['n'], s['mix']))
+        if not old or not old['median_seconds'] or not s['median_seconds']:
+            continue
+        ratio = s['median_seconds'] / old['median_seconds']
+        print(f"{s['engine']:<10} {s['n']:>4}人 {s['mix']:<8} "
+              f"{old['median_seconds']:.4f}s → {s['median_seconds']:.4f}s  (×{ratio:.2f})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="排座引擎基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--mixes', nargs='+', default=list(MIXES), choices=list(MIXES))
+    parser.add_argument('--engines', nargs='+', default=list(DEFAULT_ENGINES),
+                        choices=('backtrack', 'anneal', 'seed', 'pattern', 'empty', 'random', 'arranger'))
+    parser.add_argument('--repeats', type=int, default=3, help="每个用例使用的种子数（0, 1, ...）")
+    parser.add_argument('--time-limit', type=float, default=10.0, help="单次运行的时间上限（秒）")
+    parser.add_argument('--workers', type=int, default=1, help="每次运行使用的线程/进程数")
+    parser.add_argument('--arranger-max', type=int, default=16,
+                        help="ClassroomArranger 只测试不超过此人数的名单（它按类型图案顺序枚举）")
+    parser.add_argument('-o', '--output', help="结果 JSON 路径，默认为 benchmarks/results/<时间>.json")
+    parser.add_argument('--compare', help="与之前的结果 JSON 对比")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    cases = [{'engine': engine, 'n': n, 'mix': mix, 'seed': seed,
+              'time_limit': args.time_limit, 'workers': args.workers}
+             for engine in args.engines
+             for n in args.sizes
+             for mix in args.mixes
+             for seed in range(args.repeats)
+             if engine != 'arranger' or n <= args.arranger_max]
+
+    results = []
+    # 每个用例一个全新子进程，峰值内存才有可比性
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        for result in executor.map(run_case, cases):
+            results.append(result)
+            if result.get('infeasible'):
+                status = f"无解（{', '.join(result['infeasible'])}）"
+            else:
+                status = "成功" if result['ok'] else "失败"
+            print(f"{result['engine']:<10} {result['n']:>4}人 {result['mix']:<8} "
+                  f"种子{result['seed']:<3} {result['seconds']:>9.4f}s  {status}", flush=True)
+
+    summary = summarize(results)
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'args': vars(args),
+        'summary': summary,
+        'cases': results,
+    }
+    output = args.output or str(ROOT / 'benchmarks' / 'results' / f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到：{output}")
+
+    if args.compare:
+        compare(summary, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# anneal.py
+import math
+import random
+import time
+
+from evaluator import IncrementalEvaluator
+from validator import EMPTY
+
+
+class AnnealingSolver:
+    """模拟退火 + 最小冲突局部搜索：不断交换两个座位，把违规座位数降到0
+
+    违规变化由 IncrementalEvaluator 增量计算。每一步从违规座位中随机
+    选一个，抽样若干交换对象并取违规变化最小的一个；变差的交换按退火温度概率
+    接受，长时间没有进展时从新的随机布局重新开始。
+    """
+
+    INITIAL_TEMPERATURE = 2.0
+    MIN_TEMPERATURE = 0.05
+    COOLING = 0.999
+    SAMPLE_SIZE = 16        # 每步抽样的交换对象数
+    RESTART_AFTER = 5000    # 连续多少步没有改进就重新开始
+
+    def __init__(self, types, graph, stop_event=None, stats=None):
+        self.types = list(types)
+        self.graph = graph  # room.SeatGraph
+        self.seat_count = graph.seat_count
+        if len(self.types) > self.seat_count:
+            raise ValueError("座位数量不足")
+        self.stop_event = stop_event
+        self.stats = stats  # 可选的 WorkerStats
+        self.iterations = 0
+        self.restarts = 0
+
+    def solve(self, rng=None, time_limit=10.0, initial=None):
+        """搜索，返回 (座位→学生索引列表, 违规座位数)
+
+        initial 为可选的初始布局（座位→学生索引列表），不提供时随机生成。
+        违规数为0即为合法排列；超时或被中止时返回目前找到的最好布局。
+        """
+        rng = rng or random.Random()
+        deadline = time.monotonic() + time_limit
+        self.iterations = 0
+        self.restarts = 0
+
+        self._load(list(initial) if initial is not None else self._random_assignment(rng))
+        best_count, best = len(self.conflicts), list(self.seat_of)
+        temperature = self.INITIAL_TEMPERATURE
+        stale = 0
+
+        while best_count > 0:
+            if self.iterations % 64 == 0:
+                if self.stats:
+                    self.stats.flush()
+                if time.monotonic() >= deadline or self._stopped():
+                    break
+            self.iterations += 1
+
+            if self.stats:
+                started = time.perf_counter()
+                seat = rng.choice(tuple(self.conflicts))
+                picked = time.perf_counter()
+                move = self._best_swap(seat, rng)
+                self.stats.generation_seconds += picked - started
+                self.stats.validation_seconds += time.perf_counter() - picked
+            else:
+                move = self._best_swap(rng.choice(tuple(self.conflicts)), rng)
+            if move is not None:
+                a, b, delta = move
+                if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                    self._swap(a, b)
+
+            if len(self.conflicts) < best_count:
+                best_count, best = len(self.conflicts), list(self.seat_of)
+                stale = 0
+            else:
+                stale += 1
+            temperature = max(self.MIN_TEMPERATURE, temperature * self.COOLING)
+
+            if stale >= self.RESTART_AFTER:
+                self.restarts += 1
+                self._load(self._random_assignment(rng))
+                temperature = self.INITIAL_TEMPERATURE
+                stale = 0
+                # 新的随机布局可能比目前最好的还少冲突（甚至没有冲突，此时循环结束）
+                if len(self.conflicts) < best_count:
+                    best_count, best = len(self.conflicts), list(self.seat_of)
+
+        if self.stats:
+            self.stats.flush()
+        return best, best_count
+
+    def _stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def _random_assignment(self, rng):
+        seat_of = list(range(len(self.types))) + [None] * (self.seat_count - len(self.types))
+        rng.shuffle(seat_of)
+        return seat_of
+
+    def _load(self, seat_of):
+        """载入布局并建立增量评估器"""
+        self.seat_of = seat_of
+        grid = [EMPTY if idx is None else self.types[idx] for idx in seat_of]
+        self.evaluator = IncrementalEvaluator(grid, self.graph)
+        self.grid = self.evaluator.grid
+        self.conflicts = self.evaluator.conflicts
+
+    def _best_swap(self, a, rng):
+        """为违规座位 a 抽样交换对象，返回变化最小的 (a, b, delta)"""
+        best = None
+        for _ in range(self.SAMPLE_SIZE):
+            b = rng.randrange(self.seat_count)
+            if self.grid[b] == self.grid[a]:
+                continue
+            delta = self.evaluator.swap_delta(a, b)
+            if self.stats:
+                self.stats.generated += 1
+                self.stats.validated += 1
+                # 会新增违规的交换计为被拒绝，归到它新违反的规则
+                if delta > 0 and self.evaluator.last_rule is not None:
+                    self.stats.reject(self.evaluator.last_rule)
+            if best is None or delta < best[2]:
+                best = (a, b, delta)
+        return best
+
+    def _swap(self, a, b):
+        self.seat_of[a], self.seat_of[b] = self.seat_of[b], self.seat_of[a]
+        self.evaluator.swap(a, b)
@@ -0,0 +1,151 @@
+# batch.py
+"""无界面批量排座：一次为多个班级的名单排座并导出 Excel
+
+用法示例：
+    python batch.py rosters/ -o 座位表/ --workers 8
+    python batch.py "rosters/高一*.json" --workbook 全年级.xlsx
+    python batch.py rosters/ --room 教室.json
+    python batch.py rosters/ --weeks 20      每班一个工作簿，包含一学期20周的轮换座位表
+"""
+import argparse
+import glob
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from exporter import unique_names, write_layouts_excel
+from service import ClassroomService
+from stats import format_snapshot
+
+
+def collect_roster_files(patterns):
+    """把目录、通配符和文件路径展开为名单文件列表（去重并保持顺序）"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, '*.json'))))
+        else:
+            files.extend(sorted(glob.glob(pattern)) or [pattern])
+    return list(dict.fromkeys(files))
+
+
+def roster_names(files):
+    """班级名称取文件名（不含扩展名），不同目录下的同名文件依次加 _2、_3 后缀"""
+    return unique_names([Path(path).stem for path in files])
+
+
+def result_sheets(name, result):
+    """一个班级的结果写入 Excel 时的工作表列表：轮换座位表每周一个工作表"""
+    if 'schedule' in result:
+        return [(f"{name}_第{week['week']}周", week['layout']) for week in result['schedule']]
+    return [(name, result['layout'])]
+
+
+def solve_roster(path, mode, seed, time_limit, output_dir, room_path=None, name=None, weeks=1):
+    """在工作进程中为一个班级排座；output_dir 不为空时直接写出该班的 Excel，
+    room_path 为座位图 JSON（为空时按人数选择矩形），name 为班级名称（默认取文件名）；
+    weeks 大于1时生成一学期的轮换座位表（见 ClassroomService.arrange_rotation），
+    结果中的 'schedule' 为每周的座位表，Excel 中每周一个工作表"""
+    started = time.perf_counter()
+    summary = {'path': path, 'name': name or Path(path).stem, 'students': 0,
+               'result': None, 'error': None, 'output': None, 'stats': None}
+    service = ClassroomService()
+    timer = threading.Timer(time_limit, service.stop_event.set)
+    try:
+        service.load_from_json(path)
+        if room_path:
+            service.load_room(room_path)
+        summary['students'] = len(service.students)
+        timer.start()
+        if weeks > 1:
+            schedule = service.arrange_rotation(weeks, seed, lambda message: None,
+                                                time_limit=time_limit)
+            result = dict(schedule[0], seed=seed, schedule=schedule) if schedule else None
+        else:
+            result = service.arrange(seed, 1, lambda value: None, lambda message: None,
+                                     mode=mode, time_limit=time_limit)
+        if result is None:
+            summary['error'] = "未找到有效排列（无解或超时）"
+        elif result.get('violations'):
+            summary['error'] = f"超时，最好方案仍有{result['violations']}处冲突"
+        elif weeks > 1 and len(result['schedule']) < weeks:
+            summary['error'] = f"超时，只生成了{len(result['schedule'])}周"
+        else:
+            summary['result'] = result
+            if output_dir:
+                output = os.path.join(output_dir, f"{summary['name']}.xlsx")
+                write_layouts_excel(result_sheets(summary['name'], result), output)
+                summary['output'] = output
+    except Exception as e:
+        summary['error'] = str(e)
+    finally:
+        timer.cancel()
+    summary['stats'] = service.get_stats_snapshot()
+    summary['elapsed'] = time.perf_counter() - started
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="批量为多个班级排座并导出 Excel（无界面）")
+    parser.add_argument('rosters', nargs='+', help="名单目录、JSON 文件或通配符")
+    parser.add_argument('-o', '--output', default='.', help="每个班级一个 Excel 文件的输出目录")
+    parser.add_argument('--workbook', help="改为把所有班级写入这个工作簿（每班一个工作表）")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="同时排座的班级数（进程数）")
+    parser.add_argument('--mode', default='backtrack', choices=('backtrack', 'anneal', 'best'),
+                        help="排列引擎")
+    parser.add_argument('--room', help="所有班级共用的座位图 JSON（见 room.py），默认按人数选择矩形")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--time-limit', type=float, default=60.0, help="每个班级的时间上限（秒）")
+    parser.add_argument('--weeks', type=int, default=1,
+                        help="大于1时生成一学期的轮换座位表（每周一个工作表，尽量不与同一人再次同桌）")
+    parser.add_argument('-v', '--verbose', action='store_true', help="每个班级都输出搜索统计")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_roster_files(args.rosters)
+    if not files:
+        print("没有找到名单文件")
+        return 2
+    output_dir = None if args.workbook else args.output
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = [executor.submit(solve_roster, path, args.mode, args.seed,
+                                   args.time_limit, output_dir, args.room, name, args.weeks)
+                   for path, name in zip(files, roster_names(files))]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            status = "成功" if summary['result'] else f"失败：{summary['error']}"
+            if summary['result'] and 'schedule' in summary['result']:
+                repeats = sum(week['repeats'] for week in summary['result']['schedule'])
+                status += f"（重复同桌 {repeats} 对）"
+            print(f"{summary['name']:<20} {summary['students']:>4}人 "
+                  f"{summary['elapsed']:>8.2f}秒  {status}", flush=True)
+            if summary['stats'] and (args.verbose or not summary['result']):
+                print(f"    {format_snapshot(summary['stats'])}", flush=True)
+
+    summaries.sort(key=lambda s: files.index(s['path']))
+    solved = [s for s in summaries if s['result']]
+    if args.workbook and solved:
+        write_layouts_excel([sheet for s in solved for sheet in result_sheets(s['name'], s['result'])],
+                            args.workbook)
+        print(f"已写入工作簿：{args.workbook}")
+
+    failed = len(summaries) - len(solved)
+    print(f"\n共 {len(summaries)} 个班级，成功 {len(solved)} 个，失败 {failed} 个，"
+          f"总用时 {time.perf_counter() - started:.2f} 秒")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
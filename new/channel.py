@@ -0,0 +1,42 @@
+# channel.py
+from queue import Empty, SimpleQueue
+
+
+class UiChannel:
+    """后台线程 → Tk 主线程的消息通道
+
+    任何线程都可以调用 progress/log/call 投递消息（SimpleQueue，无需额外加锁），
+    不直接操作 Tk 控件。Tk 主循环用 after() 定时调用 drain 取出全部消息：
+    进度只保留最新值，日志合并成一批，回调按投递顺序执行。
+    """
+
+    def __init__(self):
+        self._queue = SimpleQueue()
+
+    def progress(self, value):
+        self._queue.put(('progress', value))
+
+    def log(self, line):
+        self._queue.put(('log', line))
+
+    def call(self, func, *args):
+        """让 func(*args) 在主线程中执行（如显示结果、更新按钮）"""
+        self._queue.put(('call', (func, args)))
+
+    def drain(self, limit=10000):
+        """取出积压的消息，返回 (最新进度或 None, 日志行列表, 回调列表)"""
+        progress = None
+        lines = []
+        calls = []
+        for _ in range(limit):
+            try:
+                kind, payload = self._queue.get_nowait()
+            except Empty:
+                break
+            if kind == 'progress':
+                progress = payload
+            elif kind == 'log':
+                lines.append(payload)
+            else:
+                calls.append(payload)
+        return progress, lines, calls
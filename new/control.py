@@ -8,9 +8,27 @@ import time
 from pathlib import Path
 from tkinter import messagebox, filedialog
 
-import pandas as pd
-
+from exporter import export_in_background, type_to_text
+from channel import UiChannel
 from service import ClassroomService
+from stats import format_snapshot
+from vtable import VirtualTable
+
+# 主线程处理后台消息（进度、日志、结果）的间隔（毫秒）
+UI_REFRESH_MS = 50
+
+# 搜索统计写入日志的间隔（毫秒）
+STATS_INTERVAL_MS = 2000
+
+# 优选模式的搜索时间（秒）和保留的方案数
+BEST_TIME_LIMIT = 10.0
+BEST_TOP_K = 5
+
+# 导入失败时对话框中最多列出的错误条数
+MAX_ERROR_LINES = 20
+
+# 并行搜索进程数上限（至少8，多核机器上可用满全部核心）
+MAX_WORKERS = max(8, os.cpu_count() or 1)
 
 
 class Controller:
@@ -18,6 +36,10 @@ class Controller:
         self.service = ClassroomService()
         self.running = False
         self.ui = None
+        self.channel = UiChannel()
+        self.student_view = None  # 名单表格和结果表格的虚拟视图（VirtualTable），init 时创建
+        self.result_view = None
+        self.result_layout = []   # 结果表格当前显示的座位表
         self.config_file = "app_config.json"
         self.load_config()
         self.last_opened_dir = str(Path.home())
@@ -28,6 +50,11 @@ class Controller:
         self.ui = ui
         self._bind_events()
         self._init_components()
+        self.student_view = VirtualTable(self.ui.tk_table_m8bg960c,
+                                         lambda: len(self.service.students), self._student_row)
+        self.result_view = VirtualTable(self.ui.tk_table_m8awzxkt,
+                                        lambda: len(self.result_layout), self._result_row)
+        self.ui.after(UI_REFRESH_MS, self._pump_ui)
         self._update_seed_limit()
         self.load_student_table()
 
@@ -41,14 +68,16 @@ class Controller:
             (self.ui.tk_button_m8b9721p, self.export_result),
             (self.ui.tk_button_m8betf3s, self.add_student),
             (self.ui.tk_button_m8bgba2z, self.import_json),
-            (self.ui.tk_button_save, self.save_students)
+            (self.ui.tk_button_save, self.save_students),
+            (self.ui.tk_button_room, self.import_room)
         ]
         for widget, callback in event_map:
             widget.config(command=callback)
+        self.ui.tk_select_solution.bind("<<ComboboxSelected>>", self.select_solution)
 
     # 组件初始化
     def _init_components(self):
-        self.ui.tk_scale_m8b91zcg.config(from_=1, to=8)
+        self.ui.tk_scale_m8b91zcg.config(from_=1, to=MAX_WORKERS)
         self.ui.tk_scale_m8b91zcg.set(4)
         self.ui.tk_input_m8b925pn.delete(0, 'end')
         self.ui.tk_input_m8b925pn.insert(0, "4")
@@ -57,13 +86,12 @@ class Controller:
 
     # 学生表格管理
     def load_student_table(self):
-        self.ui.tk_table_m8bg960c.delete(*self.ui.tk_table_m8bg960c.get_children())
-        for idx, student in enumerate(self.service.students):
-            self.ui.tk_table_m8bg960c.insert("", "end", values=(
-                idx + 1,
-                student['name'],
-                self._type_to_text(student['type'])
-            ))
+        """名单变化后刷新表格（只重绘可见的行）"""
+        self.student_view.scroll_to(0)
+
+    def _student_row(self, idx):
+        students = self.service.students
+        return idx + 1, students.names[idx], self._type_to_text(students.types[idx])
 
     def _load_config(self):
         """加载应用程序配置"""
@@ -86,11 +114,7 @@ class Controller:
             except Exception as e:
                 print(f"保存配置失败: {str(e)}")
     def _type_to_text(self, t):
-        type_map = {
-            1: "好学生", 0: "普通学生",
-            -1: "说话学生", -2: "严重说话"
-        }
-        return type_map.get(t, "未知")
+        return type_to_text(t)
 
     # 种子管理
     def _update_seed_limit(self):
@@ -143,13 +167,12 @@ class Controller:
             self.start_arrangement()
 
     def start_arrangement(self):
-
-        """添加大数验证"""
-        n = len(self.service.students)
-        if n > 10:
-            if not messagebox.askyesno("确认",
-                                       "10人以上排列可能需要较长时间，是否继续？"):
-                return
+        """启动前先做快速可行性检查，能证明无解时直接说明原因"""
+        failures = self.service.analyze_feasibility()
+        if failures:
+            messagebox.showerror("名单无解",
+                                 "\n".join(f"• {f['message']}" for f in failures))
+            return
 
         try:
             max_seed = self.service.get_max_seed()
@@ -164,85 +187,148 @@ class Controller:
 
             threading.Thread(
                 target=self._run_arrangement,
-                args=(params['seed'], params['thread_num']),
+                args=(params['seed'], params['thread_num'], self.ui.tk_check_best_var.get()),
                 daemon=True
             ).start()
+            self.ui.after(STATS_INTERVAL_MS, self._poll_stats)
         except ValueError as e:
             messagebox.showerror("参数错误", str(e))
 
+    def _poll_stats(self):
+        """运行期间定期把搜索统计（速率、按规则的拒绝数）写入日志"""
+        if not self.running:
+            return
+        snapshot = self.service.get_stats_snapshot()
+        if snapshot and snapshot['generated']:
+            self.log(format_snapshot(snapshot))
+        self.ui.after(STATS_INTERVAL_MS, self._poll_stats)
+
+    def stop_arrangement(self):
+        """中止正在进行的排列（同时通知所有工作进程）"""
+        self.service.stop_event.set()
+        self.log("正在停止计算...")
+
     def _validate_params(self):
-        global max_seed
         params = {}
         if not self.service.students:
             raise ValueError("请先添加学生数据")
 
-        # 验证种子
+        # 验证种子（范围为 [0, n!)，种子可以复现相同的排列）
+        max_seed = self.service.get_max_seed()
         try:
             params['seed'] = int(self.ui.tk_input_m8b8y7zs.get())
-            max_seed = len(self.service.students)
-            if not (0 <= params['seed'] <= max_seed):
+            if not (0 <= params['seed'] < max_seed):
                 raise ValueError
         except:
-            raise ValueError(f"种子必须为0-{max_seed}之间的整数")
+            raise ValueError(f"种子必须为0到{len(self.service.students)}!-1之间的整数")
 
         # 验证线程数
         try:
             params['thread_num'] = int(self.ui.tk_input_m8b925pn.get())
-            if not (1 <= params['thread_num'] <= 8):
+            if not (1 <= params['thread_num'] <= MAX_WORKERS):
                 raise ValueError
         except:
-            raise ValueError("线程数必须为1-8之间的整数")
+            raise ValueError(f"线程数必须为1-{MAX_WORKERS}之间的整数")
 
         return params
 
-    def _run_arrangement(self, seed, thread_num):
+    def _run_arrangement(self, seed, thread_num, best=False):
+        """后台线程中排列；best 为 True 时按软约束保留多个方案供选择"""
         try:
-            result = self.service.arrange(
-                seed=seed,
-                thread_num=thread_num,
-                progress_callback=self._update_progress,
-                log_callback=self.log
-            )
-
-            if result:
-                self.log(f"成功找到排列方案！种子：{result['seed']}")
+            if best:
+                result = self._stream_best(seed)
+            else:
+                result = self.service.arrange(
+                    seed=seed,
+                    thread_num=thread_num,
+                    progress_callback=self._update_progress,
+                    log_callback=self.log
+                )
+            self.channel.call(self._show_solutions, result)
+
+            if result and result.get('violations'):
+                self.log(f"未找到完全满足规则的排列，显示冲突最少的方案（{result['violations']}处冲突）")
+                self.service.current_result = result
+                self.channel.call(self._show_result, result)
+            elif result:
+                note = "（线程数设为1即可复现）" if thread_num > 1 else ""
+                self.log(f"成功找到排列方案！种子：{result['seed']}{note}")
                 self.service.current_result = result
-                self._show_result(result)
+                self.channel.call(self._show_result, result)
             else:
                 self.log("排列被中止")
         except Exception as e:
             self.log(f"发生错误：{str(e)}")
         finally:
+            snapshot = self.service.get_stats_snapshot()
+            if snapshot:
+                self.log(format_snapshot(snapshot))
             self.running = False
-            self.ui.tk_button_m8b95daa.config(text="开始")
+            self.channel.call(self.ui.tk_button_m8b95daa.config, {'text': "开始"})
             self._update_progress(100)
 
+    def _stream_best(self, seed):
+        """优选模式：找到第一个合法布局就显示，之后每找到更好的方案就替换"""
+        found = False
+        for solution in self.service.stream_arrangement(
+                seed, time_limit=BEST_TIME_LIMIT, top_k=BEST_TOP_K,
+                progress_callback=self._update_progress):
+            self.log(f"找到{'更好的' if found else ''}方案："
+                     f"得分 {solution['score']:g}，用时 {solution['elapsed']:.2f} 秒")
+            found = True
+            self.service.current_result = solution
+            self.channel.call(self._show_result, solution)
+        return self.service.best_solution
+
+    def _show_solutions(self, result):
+        """把优选模式的多个方案列入下拉框，其他模式清空下拉框"""
+        solutions = result.get('solutions', []) if result else []
+        self.ui.tk_select_solution['values'] = [
+            f"方案{i + 1}（得分 {s['score']:g}）" for i, s in enumerate(solutions)]
+        if solutions:
+            self.ui.tk_select_solution.current(0)
+        else:
+            self.ui.tk_select_solution.set("")
+
+    def select_solution(self, event=None):
+        """切换显示和导出的方案"""
+        result = self.service.best_solution
+        index = self.ui.tk_select_solution.current()
+        if not result or not result.get('solutions') or index < 0:
+            return
+        self.service.current_result = result['solutions'][index]
+        self._show_result(self.service.current_result)
+        self.log(f"已切换到方案{index + 1}（得分 {self.service.current_result['score']:g}）")
+
     def _show_result(self, result):
         """优化结果显示"""
         layout = result['layout']
 
-        # 清空原有数据
-        self.ui.tk_table_m8awzxkt.delete(*self.ui.tk_table_m8awzxkt.get_children())
-
-        # 动态生成列
+        # 列数变化时才重新生成列
         columns = [f"列{i + 1}" for i in range(len(layout[0]))] + ["行"]
-        self.ui.tk_table_m8awzxkt["columns"] = columns
-
-        # 设置列格式
-        for col in columns:
-            self.ui.tk_table_m8awzxkt.heading(col, text=col, anchor='center')
-            self.ui.tk_table_m8awzxkt.column(col, width=80, anchor='center')
-
-        # 填充数据
-        for row_idx, row in enumerate(layout):
-            values = []
-            for seat in row:
-                if seat and seat['name'] != '空座位':
-                    values.append(f"{seat['name']}({self._type_to_text(seat['type'])})")
-                else:
-                    values.append("")
-            values.append(f"第{row_idx + 1}行")
-            self.ui.tk_table_m8awzxkt.insert("", "end", values=values)
+        if tuple(self.ui.tk_table_m8awzxkt["columns"] or ()) != tuple(columns):
+            # 清空原有数据
+            self.ui.tk_table_m8awzxkt.delete(*self.ui.tk_table_m8awzxkt.get_children())
+            self.ui.tk_table_m8awzxkt["columns"] = columns
+
+            # 设置列格式
+            for col in columns:
+                self.ui.tk_table_m8awzxkt.heading(col, text=col, anchor='center')
+                self.ui.tk_table_m8awzxkt.column(col, width=80, anchor='center')
+
+        # 只填充可见的行，滚动时再生成其他行
+        self.result_layout = layout
+        self.result_view.scroll_to(0)
+
+    def _result_row(self, row_idx):
+        values = []
+        for seat in self.result_layout[row_idx]:
+            if seat and seat['name'] != '空座位':
+                values.append(f"{seat['name']}({self._type_to_text(seat['type'])})")
+            else:
+                values.append("")
+        values.append(f"第{row_idx + 1}行")
+        return values
 
     # 其他功能
     def import_json(self):
@@ -262,8 +348,31 @@ class Controller:
                 self.log(f"成功导入：{filepath}")
                 messagebox.showinfo("导入成功", "学生数据已加载")
             except Exception as e:
-                messagebox.showerror("导入失败", str(e))
-                self.log(f"导入错误：{str(e)}")
+                # 名单错误逐行列出，过多时只显示前面若干条
+                lines = str(e).splitlines()
+                if len(lines) > MAX_ERROR_LINES:
+                    lines = lines[:MAX_ERROR_LINES] + [f"……共 {len(lines)} 处错误"]
+                messagebox.showerror("导入失败", "\n".join(lines))
+                self.log(f"导入错误：{lines[0] if lines else e}")
+
+    def import_room(self):
+        """选择座位图 JSON；取消选择时询问是否恢复按人数自动选择矩形"""
+        filepath = filedialog.askopenfilename(
+            initialdir=self.last_opened_dir,
+            filetypes=[("座位图", "*.json")],
+            title="选择座位图文件"
+        )
+        if not filepath:
+            if self.service.room is not None and messagebox.askyesno("座位图", "是否改回按人数自动选择矩形布局？"):
+                self.service.set_room(None)
+                self.log("已恢复自动布局")
+            return
+        try:
+            room = self.service.load_room(filepath)
+            self.log(f"已加载座位图：{room.rows}行×{room.cols}列，{room.seat_count}个座位")
+        except ValueError as e:
+            messagebox.showerror("导入失败", str(e))
+            self.log(f"座位图导入错误：{str(e)}")
 
     def add_student(self):
         name = self.ui.tk_input_m8b9sdst.get().strip()
@@ -287,7 +396,8 @@ class Controller:
             self.service.add_student(name, student_type)
             self.ui.tk_input_m8b9sdst.delete(0, 'end')
             self.ui.tk_input_m8betb1b.delete(0, 'end')
-            self.load_student_table()
+            # 只重绘末尾可见的几行，不重新载入整个表格
+            self.student_view.scroll_to_end()
             self._update_seed_limit()
             self.log(f"已添加学生：{name}（类型：{student_type}）")
         except ValueError as e:
@@ -297,11 +407,11 @@ class Controller:
         """同步滑块和输入框的线程数"""
         try:
             count = int(self.ui.tk_input_m8b925pn.get())
-            if 1 <= count <= 8:
+            if 1 <= count <= MAX_WORKERS:
                 self.ui.tk_scale_m8b91zcg.set(count)
                 self.log(f"线程数已设置为：{count}")
             else:
-                messagebox.showwarning("提示", "线程数范围1-8")
+                messagebox.showwarning("提示", f"线程数范围1-{MAX_WORKERS}")
         except ValueError:
             messagebox.showerror("错误", "请输入有效数字")
 
@@ -332,19 +442,31 @@ class Controller:
         if self.auto_save and self.last_opened_file:
             try:
                 with open(self.last_opened_file, 'w') as f:
-                    json.dump(self.service.students, f, ensure_ascii=False, indent=2)
+                    json.dump(self.service.students.to_dicts(), f, ensure_ascii=False, indent=2)
             except Exception as e:
                 self.log(f"自动保存失败：{str(e)}")
 
 
     # 工具方法
     def _update_progress(self, value):
-        self.ui.tk_progressbar_m8b910ks['value'] = value
-        self.ui.update_idletasks()
+        """更新进度（任何线程均可调用，由主线程合并后显示）"""
+        self.channel.progress(value)
 
     def log(self, message):
-        self.ui.tk_text_m8b930ud.insert('end', f"{time.strftime('%H:%M:%S')} {message}\n")
-        self.ui.tk_text_m8b930ud.see('end')
+        """写日志（任何线程均可调用，由主线程批量写入）"""
+        self.channel.log(f"{time.strftime('%H:%M:%S')} {message}\n")
+
+    def _pump_ui(self):
+        """在 Tk 主线程中处理积压的后台消息：只应用最新进度，日志一次性写入"""
+        progress, lines, calls = self.channel.drain()
+        if progress is not None:
+            self.ui.tk_progressbar_m8b910ks['value'] = progress
+        if lines:
+            self.ui.tk_text_m8b930ud.insert('end', "".join(lines))
+            self.ui.tk_text_m8b930ud.see('end')
+        for func, args in calls:
+            func(*args)
+        self.ui.after(UI_REFRESH_MS, self._pump_ui)
 
     def select_output_path(self):
         path = filedialog.asksaveasfilename(
@@ -356,41 +478,27 @@ class Controller:
             self.ui.tk_input_m8b95r63.insert(0, path)
 
     def export_result(self):
-        """改进的Excel导出"""
+        """在后台线程中导出 Excel，界面不会卡住，进度显示在进度条上"""
         if not self.service.current_result:
             messagebox.showwarning("警告", "没有可导出的结果")
             return
 
         path = self.ui.tk_input_m8b95r63.get()
-        try:
-            # 获取布局数据
-            layout = self.service.current_result['layout']
-
-            # 创建DataFrame
-            data = []
-            max_cols = max(len(row) for row in layout)
-            columns = [f"列{i + 1}" for i in range(max_cols)]
-
-            for row_idx, row in enumerate(layout, 1):
-                row_data = {"行": f"第{row_idx}排"}
-                for col_idx, seat in enumerate(row, 1):
-                    if seat and seat['name'] != '空座位':
-                        row_data[f"列{col_idx}"] = f"{seat['name']}({self._type_to_text(seat['type'])})"
-                    else:
-                        row_data[f"列{col_idx}"] = ""
-                data.append(row_data)
-
-            df = pd.DataFrame(data).fillna("")
-            df.set_index("行", inplace=True)
-
-            # 导出Excel
-            df.to_excel(path, engine='openpyxl')
-
+        self.ui.tk_button_m8b9721p.config(state='disabled')
+        self._update_progress(0)
+        export_in_background([("座位表", self.service.current_result['layout'])], path,
+                             progress=self._update_progress,
+                             done=lambda error: self.channel.call(self._export_done, path, error))
+
+    def _export_done(self, path, error):
+        """导出结束（在主线程中调用）"""
+        self.ui.tk_button_m8b9721p.config(state='normal')
+        if error is None:
             messagebox.showinfo("成功", f"文件已保存到：{path}")
             self.log(f"成功导出结果到：{path}")
-        except Exception as e:
-            messagebox.showerror("错误", f"导出失败：{str(e)}")
-            self.log(f"导出错误：{str(e)}")
+        else:
+            messagebox.showerror("错误", f"导出失败：{str(error)}")
+            self.log(f"导出错误：{str(error)}")
 
     def _load_config(self):
         """加载用户配置"""
@@ -416,7 +524,7 @@ class Controller:
         if filepath:
             try:
                 with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(self.service.students, f, ensure_ascii=False)
+                    json.dump(self.service.students.to_dicts(), f, ensure_ascii=False)
                 self.config["last_save_path"] = os.path.dirname(filepath)
                 self._save_config()
                 messagebox.showinfo("保存成功", "学生数据已保存")
@@ -453,7 +561,7 @@ class Controller:
         )
         if filepath:
             try:
-                data = [dict(name=s['name'], type=s['type']) for s in self.service.students]
+                data = self.service.students.to_dicts()
                 with open(filepath, 'w', encoding='utf-8') as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
                 messagebox.showinfo("保存成功", "学生数据已保存")
@@ -0,0 +1,125 @@
+# engines.py
+"""可插拔的排列引擎注册表，供 ClassroomService 的 portfolio 模式同时运行多个引擎
+
+引擎是模块顶层的函数 solve(types, graph, seed, stop_event, stats, time_limit)，
+返回合法的 座位→学生索引列表，找不到或被中止时返回 None。函数会被传到工作进程中
+执行，因此必须定义在模块顶层（可被 pickle）。complete 表示引擎是完备的：返回 None
+且未被中止时说明名单无解。
+
+组合模式的胜出记录写入 PortfolioHistory（追加写入的 JSON Lines 文件），
+之后的组合按相近规模名单上的胜出次数排序引擎。
+"""
+import json
+import random
+import time
+from collections import Counter
+
+import numpy as np
+
+from anneal import AnnealingSolver
+from parallel import sample_until_valid
+from solver import BacktrackingSolver
+
+
+class Engine:
+    """注册表中的一个引擎"""
+
+    __slots__ = ('name', 'solve', 'complete')
+
+    def __init__(self, name, solve, complete=False):
+        self.name = name
+        self.solve = solve
+        self.complete = complete
+
+
+ENGINES = {}
+
+
+def register_engine(name, solve, complete=False):
+    """注册（或替换）名为 name 的引擎"""
+    ENGINES[name] = Engine(name, solve, complete)
+
+
+def get_engine(name):
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"未知的引擎：{name}（可选 {'/'.join(ENGINES)}）")
+    return engine
+
+
+def engine_names():
+    return list(ENGINES)
+
+
+# 内置引擎
+def solve_backtrack(types, graph, seed, stop_event, stats, time_limit):
+    """回溯搜索：适合约束紧的名单，穷尽时说明无解"""
+    return BacktrackingSolver(types, graph, stop_event=stop_event, stats=stats).solve(
+        random.Random(seed))
+
+
+def solve_anneal(types, graph, seed, stop_event, stats, time_limit):
+    """模拟退火：适合大班，超时仍有冲突时视为失败"""
+    solver = AnnealingSolver(types, graph, stop_event=stop_event, stats=stats)
+    assignment, violations = solver.solve(random.Random(seed), time_limit=time_limit)
+    return None if violations else assignment
+
+
+def solve_random(types, graph, seed, stop_event, stats, time_limit):
+    """随机抽样（向量化验证）：约束宽松的名单通常第一批就能命中"""
+    return sample_until_valid(types, graph, np.random.default_rng(seed), stop_event, stats)
+
+
+register_engine('backtrack', solve_backtrack, complete=True)
+register_engine('anneal', solve_anneal)
+register_engine('random', solve_random)
+
+
+class PortfolioHistory:
+    """组合模式的胜出记录：追加写入的 JSON Lines 文件，每次排列一行
+
+    每行记录名单规模（人数、座位数、各类型人数）、参赛引擎、胜出引擎和用时。
+    """
+
+    # 人数与本次相差不超过这个比例的记录视为“相近规模”
+    SIMILAR = 0.25
+
+    def __init__(self, path):
+        self.path = path
+
+    def record(self, types, seats, engines, winner, elapsed):
+        counts = Counter(types)
+        entry = {'time': time.time(), 'students': len(types), 'seats': seats,
+                 'counts': {str(t): counts[t] for t in sorted(counts)},
+                 'engines': list(engines), 'winner': winner, 'elapsed': round(elapsed, 4)}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def entries(self):
+        """读取全部记录（跳过损坏的行），文件不存在时为空"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return entries
+
+    def wins(self, students=None):
+        """各引擎的胜出次数；给出 students 时只统计相近规模的名单（没有时统计全部）"""
+        entries = [e for e in self.entries() if e.get('winner')]
+        if students:
+            similar = [e for e in entries
+                       if abs(e.get('students', 0) - students) <= students * self.SIMILAR]
+            entries = similar or entries
+        return Counter(e['winner'] for e in entries)
+
+    def ranked(self, names, students=None):
+        """按胜出次数从多到少排列引擎（次数相同时保持原顺序）"""
+        wins = self.wins(students)
+        return sorted(names, key=lambda name: -wins[name])
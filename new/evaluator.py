@@ -0,0 +1,104 @@
+# evaluator.py
+from stats import TALK_ADJACENT, SERIOUS_NEARBY, SERIOUS_UNSUPERVISED
+
+
+class IncrementalEvaluator:
+    """增量违规评估器：维护每个座位周围各类型学生的数量和违规状态
+
+    grid 为每个座位的类型列表（按座位图 graph 的座位编号，空座位为 validator.EMPTY）。
+    交换两个座位时只更新这两个座位2格以内的邻居计数，并只重新判断其中的问题学生，
+    代价与班级大小无关。
+    规则与 validator.seat_rule_masks 一致。
+    """
+
+    def __init__(self, grid, graph):
+        self.grid = list(grid)
+        self.near1 = graph.near1.lists
+        self.near2 = graph.near2.lists
+
+        n = graph.seat_count
+        self.talk1 = [0] * n     # 周围1格内 -1 学生数
+        self.serious2 = [0] * n  # 周围2格内 -2 学生数
+        self.good2 = [0] * n     # 周围2格内好学生数
+        for seat, t in enumerate(self.grid):
+            self._count(seat, t, 1)
+        self.conflicts = {s for s in range(n) if self.seat_violates(s)}
+        self.last_rule = None  # 上一次交换新产生的第一个违规所违反的规则（stats 中的编号）
+
+    @property
+    def violations(self):
+        """当前违规座位数"""
+        return len(self.conflicts)
+
+    def seat_violates(self, seat):
+        """座位上的学生是否违反规则（O(1)）"""
+        t = self.grid[seat]
+        if t == -1:
+            return self.talk1[seat] > 0
+        if t == -2:
+            return self.serious2[seat] > 0 or self.good2[seat] == 0
+        return False
+
+    def seat_rule(self, seat):
+        """座位上的学生违反的规则，未违规时为 None"""
+        t = self.grid[seat]
+        if t == -1 and self.talk1[seat] > 0:
+            return TALK_ADJACENT
+        if t == -2:
+            if self.serious2[seat] > 0:
+                return SERIOUS_NEARBY
+            if self.good2[seat] == 0:
+                return SERIOUS_UNSUPERVISED
+        return None
+
+    def swap(self, a, b):
+        """交换两个座位并返回违规座位数的变化，新产生的违规规则记录在 last_rule"""
+        before = len(self.conflicts)
+        self.last_rule = None
+        ta, tb = self.grid[a], self.grid[b]
+        if ta == tb:
+            return 0
+        self._set(a, tb)
+        self._set(b, ta)
+        for seat in self._affected(a, b):
+            if self.seat_violates(seat):
+                if seat not in self.conflicts:
+                    self.conflicts.add(seat)
+                    if self.last_rule is None:
+                        self.last_rule = self.seat_rule(seat)
+            else:
+                self.conflicts.discard(seat)
+        return len(self.conflicts) - before
+
+    def swap_delta(self, a, b):
+        """计算交换两个座位带来的违规变化，但不改变当前布局（last_rule 为交换后的结果）"""
+        delta = self.swap(a, b)
+        rule = self.last_rule
+        self.swap(a, b)
+        self.last_rule = rule
+        return delta
+
+    def _affected(self, a, b):
+        """交换后可能改变违规状态的座位（只有问题学生可能违规）"""
+        grid = self.grid
+        seats = {a, b}
+        seats.update(q for q in self.near2[a] if grid[q] < 0)
+        seats.update(q for q in self.near2[b] if grid[q] < 0)
+        return seats
+
+    def _set(self, seat, t):
+        self._count(seat, self.grid[seat], -1)
+        self.grid[seat] = t
+        self._count(seat, t, 1)
+
+    def _count(self, seat, t, step):
+        """把座位上类型为 t 的学生计入（step=1）或移出（step=-1）邻居的计数"""
+        if t == -1:
+            for q in self.near1[seat]:
+                self.talk1[q] += step
+        elif t == -2:
+            for q in self.near2[seat]:
+                self.serious2[q] += step
+        elif t == 1:
+            for q in self.near2[seat]:
+                self.good2[q] += step
@@ -0,0 +1,94 @@
+# exporter.py
+"""座位表导出：用 openpyxl 的只写（write-only）工作簿逐行流式写出，不依赖 pandas
+
+只写工作簿不在内存中保留单元格对象，上百个班级或轮换方案写入同一个工作簿
+（每个座位表一个工作表）也只需几秒。
+"""
+import re
+import threading
+
+TYPE_TEXT = {
+    1: "好学生", 0: "普通学生",
+    -1: "说话学生", -2: "严重说话"
+}
+
+
+def type_to_text(t):
+    return TYPE_TEXT.get(t, "未知")
+
+
+def sheet_title(name):
+    """生成合法的工作表名（去掉非法字符，最长31个字符）"""
+    return re.sub(r'[\[\]:*?/\\]', '_', str(name))[:31] or "Sheet"
+
+
+def unique_names(names, limit=None):
+    """为重复的名称加 _2、_3 等后缀（不区分大小写，limit 为截断后的最大长度）"""
+    used = set()
+    result = []
+    for name in names:
+        base = name[:limit] if limit else name
+        candidate, number = base, 1
+        while candidate.lower() in used:
+            number += 1
+            suffix = f"_{number}"
+            candidate = (base[:limit - len(suffix)] if limit else base) + suffix
+        used.add(candidate.lower())
+        result.append(candidate)
+    return result
+
+
+def sheet_titles(names):
+    """生成互不重复的合法工作表名（Excel 工作表名不区分大小写）"""
+    return unique_names([sheet_title(name) for name in names], 31)
+
+
+def seat_text(seat):
+    """单元格文字：姓名(类型)，空座位和不可用位置为空"""
+    if seat and seat['name'] != '空座位':
+        return f"{seat['name']}({type_to_text(seat['type'])})"
+    return ""
+
+
+def layout_rows(layout):
+    """座位表的表格行：表头为“行、列1…列n”，之后每排一行"""
+    cols = max((len(row) for row in layout), default=0)
+    yield ["行"] + [f"列{col}" for col in range(1, cols + 1)]
+    for row_idx, row in enumerate(layout, 1):
+        yield [f"第{row_idx}排"] + [seat_text(seat) for seat in row]
+
+
+def write_layouts_excel(sheets, path, progress=None):
+    """把多个座位表流式写入同一个工作簿，sheets 为 (工作表名, 座位表) 列表
+
+    progress 为可选的进度回调（0-100），每写完一个工作表调用一次。
+    """
+    from openpyxl import Workbook  # 第一次导出时才加载，不拖慢界面启动
+
+    sheets = list(sheets)
+    workbook = Workbook(write_only=True)
+    titles = sheet_titles([name for name, _ in sheets])
+    for done, (title, (_, layout)) in enumerate(zip(titles, sheets), 1):
+        sheet = workbook.create_sheet(title)
+        for row in layout_rows(layout):
+            sheet.append(row)
+        if progress is not None:
+            progress(done * 100 / len(sheets))
+    workbook.save(path)
+
+
+def export_in_background(sheets, path, progress=None, done=None):
+    """在后台线程中执行 write_layouts_excel，结束时调用 done(error)（成功时 error 为 None）"""
+    def work():
+        try:
+            write_layouts_excel(sheets, path, progress)
+        except Exception as e:
+            if done is not None:
+                done(e)
+        else:
+            if done is not None:
+                done(None)
+
+    thread = threading.Thread(target=work, daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,97 @@
+# feasibility.py
+"""排列前的快速可行性检查（毫秒级）
+
+只用计数上界判断名单在给定座位图上是否一定无解，不做任何搜索：
+- 座位数必须不少于学生数；
+- -2 学生两两距离至少为3、-1 学生两两距离至少为2：把网格划分成“块内任意两格
+  都冲突”的小块（square 邻域下 -2 为 3×3、-1 为 2×2），每块最多坐一名，
+  上界为有可用座位的块数（取所有划分偏移中的最小值）；
+- 每名 -2 周围2格内需要好学生，一名好学生周围2格内用同样的分块方法估计最多能
+  容纳的 -2 人数，好学生人数必须足够覆盖全部 -2。
+检查通过不代表一定有解，只说明没有违反这些上界。
+"""
+import math
+
+
+def _conflict_boxes(shape, distance):
+    """块内任意两格距离都不超过 distance 的矩形块尺寸 (高, 宽)"""
+    if shape == 'square':
+        return [(distance + 1, distance + 1)]
+    return [(h, w) for h in range(1, distance + 2) for w in range(1, distance + 2)
+            if (h - 1) + (w - 1) <= distance]
+
+
+def _packing_bound(positions, boxes):
+    """按块划分后有座位的块数（所有块尺寸和偏移中的最小值）：每块最多坐一名"""
+    best = len(positions)
+    for h, w in boxes:
+        for dy in range(h):
+            for dx in range(w):
+                blocks = {((row + dy) // h, (col + dx) // w) for row, col in positions}
+                best = min(best, len(blocks))
+    return best
+
+
+def max_spaced(graph, distance):
+    """座位图上两两距离大于 distance 的学生最多能坐下多少名（上界）"""
+    return _packing_bound(graph.positions, _conflict_boxes(graph.shape, distance))
+
+
+def supervision_capacity(graph):
+    """一名好学生周围2格内最多能管理的 -2 学生数（上界）"""
+    boxes = _conflict_boxes(graph.shape, 2)
+    cache = {}  # 周围座位的相对位置相同（如网格内部）时结果相同
+    best = 0
+    for seat, (row, col) in enumerate(graph.positions):
+        nearby = tuple((graph.positions[q][0] - row, graph.positions[q][1] - col)
+                       for q in graph.near2.lists[seat])
+        if nearby not in cache:
+            cache[nearby] = _packing_bound(nearby, boxes)
+        best = max(best, cache[nearby])
+    return best
+
+
+def check_feasibility(types, graph):
+    """检查名单在座位图 graph（room.SeatGraph）上是否违反计数上界
+
+    返回未通过的上界列表，每项为 {'bound', 'required', 'limit', 'message'}；
+    空列表表示无法证明无解。
+    """
+    counts = {t: 0 for t in (1, 0, -1, -2)}
+    for t in types:
+        counts[t] += 1
+    failures = []
+
+    def fail(bound, required, limit, message):
+        failures.append({'bound': bound, 'required': required, 'limit': limit,
+                         'message': message})
+
+    seats = graph.seat_count
+    if len(types) > seats:
+        fail('seats', len(types), seats, f"{len(types)}名学生超过座位图的 {seats} 个座位")
+
+    serious = counts[-2]
+    if serious:
+        limit = max_spaced(graph, 2)
+        if serious > limit:
+            fail('serious_spacing', serious, limit,
+                 f"{serious}名严重说话学生(-2)需两两相隔2格以上，座位图最多容纳{limit}名")
+
+    talkative = counts[-1]
+    if talkative:
+        limit = max_spaced(graph, 1)
+        if talkative > limit:
+            fail('talk_spacing', talkative, limit,
+                 f"{talkative}名说话学生(-1)不能相邻，座位图最多容纳{limit}名")
+
+    if serious:
+        capacity = supervision_capacity(graph)
+        if capacity == 0:
+            fail('supervision', serious, 0,
+                 f"座位图中没有任何座位周围2格内有其他座位，{serious}名严重说话学生(-2)无法被管理")
+        elif counts[1] < math.ceil(serious / capacity):
+            needed = math.ceil(serious / capacity)
+            fail('supervision', needed, counts[1],
+                 f"{serious}名严重说话学生(-2)至少需要{needed}名好学生(1)管理"
+                 f"（每名好学生最多管理{capacity}名），当前只有{counts[1]}名")
+    return failures
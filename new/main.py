@@ -1,21 +1,40 @@
 # main.py
+"""程序入口
+
+    python main.py                     启动界面
+    python main.py --startup-report    报告界面启动时各模块的导入耗时（类似 -X importtime）
+    python main.py --startup-report 300  同上，并检查冷启动导入是否在300毫秒以内
+
+numpy、openpyxl 等较重的库在第一次排列或导出时才导入；依赖检查只在第一次运行
+（或 Python 环境变化）时执行一次，结果记录在 DEPENDENCY_MARKER 文件中。
+"""
 import os
 import sys
 import subprocess
+import time
 from importlib import util
-from ui import WinGUI
-from control import Controller
 
+STARTED = time.perf_counter()
 
 # 需要安装的第三方库
 REQUIRED_LIBRARIES = [
     ('numpy', 'numpy'),
-    ('pandas', 'pandas'),
     ('openpyxl', 'openpyxl'),
     ('tqdm', 'tqdm'),
     ('queue', 'queue')
 ]
 
+# 依赖检查通过后写入的标记文件，内容与当前环境一致时跳过检查
+DEPENDENCY_MARKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.deps_ok')
+
+# 启动报告中统计的模块（界面显示前需要导入的全部内容）
+STARTUP_MODULES = ('ui', 'control')
+
+
+def _environment_key():
+    names = ','.join(pkg for _, pkg in REQUIRED_LIBRARIES)
+    return f"{sys.executable}|{sys.version}|{names}"
+
 
 def install_dependencies():
     missing = []
@@ -33,21 +52,68 @@ def install_dependencies():
             sys.exit(1)
 
 
+def ensure_dependencies():
+    """只在没有标记或环境变化时检查（并安装）依赖，之后每次启动只读一个小文件"""
+    try:
+        with open(DEPENDENCY_MARKER, 'r', encoding='utf-8') as f:
+            if f.read() == _environment_key():
+                return
+    except OSError:
+        pass
+    install_dependencies()
+    try:
+        with open(DEPENDENCY_MARKER, 'w', encoding='utf-8') as f:
+            f.write(_environment_key())
+    except OSError:
+        pass  # 目录不可写时下次启动再检查
+
+
+def startup_report(target_ms=None, top=15):
+    """在新的解释器中用 -X importtime 导入界面模块，打印最慢的模块和总耗时
+
+    返回码为0；给出 target_ms 且总耗时超过目标时为1，便于在脚本中检查冷启动。
+    """
+    code = "import " + ", ".join(STARTUP_MODULES)
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                               cwd=os.path.dirname(os.path.abspath(__file__)),
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        print(completed.stderr)
+        return completed.returncode
+    timings = []
+    for line in completed.stderr.splitlines():
+        # 格式：import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings.append((int(cumulative), name.strip(), len(name) - len(name.lstrip())))
+    total = sum(us for us, _, depth in timings if depth == 1) / 1000
+    print(f"{'累计(毫秒)':>10}  模块")
+    for us, name, _ in sorted(timings, reverse=True)[:top]:
+        print(f"{us / 1000:>10.1f}  {name}")
+    heavy = [name for name in ('numpy', 'pandas', 'openpyxl') if any(n == name for _, n, _ in timings)]
+    print(f"\n界面模块导入共 {total:.1f} 毫秒" + (f"，启动时加载了 {', '.join(heavy)}" if heavy else ""))
+    if target_ms is not None and total > target_ms:
+        print(f"超过目标 {target_ms:g} 毫秒")
+        return 1
+    return 0
+
 
 # 主程序
 if __name__ == "__main__":
-    # 检查依赖
-    try:
-        import numpy
-        import pandas
-        from tkinter import ttk
-    except ImportError:
-        print("正在自动安装依赖...")
-        install_dependencies()
+    if len(sys.argv) > 1 and sys.argv[1] == '--startup-report':
+        sys.exit(startup_report(float(sys.argv[2]) if len(sys.argv) > 2 else None))
 
-    # 启动主程序
+    # 检查依赖（只在第一次运行时执行）
+    ensure_dependencies()
 
+    from ui import WinGUI
+    from control import Controller
+
+    # 启动主程序
     root = WinGUI()
     controller = Controller()
     controller.init(root)
-    root.mainloop()
\ No newline at end of file
+    root.after_idle(lambda: controller.log(
+        f"启动用时 {(time.perf_counter() - STARTED) * 1000:.0f} 毫秒"))
+    root.mainloop()
@@ -0,0 +1,57 @@
+# neighbors.py
+from functools import lru_cache
+
+import numpy as np
+
+# 邻域形状：square 为周围一圈（含对角），cross 为前后左右（曼哈顿距离）
+SHAPES = ('square', 'cross')
+
+
+class NeighborTable:
+    """CSR 形式的邻居表：座位 s 的邻居为 indices[offsets[s]:offsets[s + 1]]
+
+    完整网格中座位按行优先编号（row * cols + col），room.SeatGraph 中为可用座位的
+    编号。lists 为同样内容的元组形式，供纯 Python 的求解器直接遍历。
+    """
+
+    __slots__ = ('rows', 'cols', 'distance', 'shape', 'offsets', 'indices', 'lists')
+
+    def __init__(self, rows, cols, distance, shape, lists):
+        self.rows = rows
+        self.cols = cols
+        self.distance = distance
+        self.shape = shape
+        self.lists = lists
+        self.offsets = np.zeros(len(lists) + 1, dtype=np.intp)
+        self.offsets[1:] = np.cumsum([len(near) for near in lists])
+        self.indices = np.fromiter((q for near in lists for q in near),
+                                   dtype=np.intp, count=int(self.offsets[-1]))
+
+    def neighbors(self, seat):
+        """座位 seat 的邻居编号数组"""
+        return self.indices[self.offsets[seat]:self.offsets[seat + 1]]
+
+    def count(self, values):
+        """对每个座位的邻居求和，values 形状为 (K, seats)，返回同形状的结果"""
+        gathered = values[:, self.indices]
+        cumulative = np.zeros((values.shape[0], gathered.shape[1] + 1), dtype=np.int32)
+        np.cumsum(gathered, axis=1, out=cumulative[:, 1:])
+        return cumulative[:, self.offsets[1:]] - cumulative[:, self.offsets[:-1]]
+
+
+@lru_cache(maxsize=None)
+def get_neighbor_table(rows, cols, distance, shape='square'):
+    """获取（并缓存）指定布局尺寸、距离和邻域形状的邻居表"""
+    if shape not in SHAPES:
+        raise ValueError(f"未知的邻域形状：{shape}")
+    deltas = [(dx, dy)
+              for dx in range(-distance, distance + 1)
+              for dy in range(-distance, distance + 1)
+              if (dx, dy) != (0, 0) and (shape == 'square' or abs(dx) + abs(dy) <= distance)]
+
+    lists = []
+    for seat in range(rows * cols):
+        row, col = divmod(seat, cols)
+        lists.append(tuple((row + dx) * cols + col + dy for dx, dy in deltas
+                           if 0 <= row + dx < rows and 0 <= col + dy < cols))
+    return NeighborTable(rows, cols, distance, shape, tuple(lists))
@@ -0,0 +1,360 @@
+# parallel.py
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from patterns import PatternScanner, assign_students, pattern_total
+from ranking import iter_combination_range, iter_seed_range
+from solver import BacktrackingSolver
+from stats import RULES, SearchStats, WorkerStats
+from validator import EMPTY, rule_rejections
+
+# 工作进程内的全局状态，由 _init_worker 在进程启动时设置一次
+_types = None
+_graph = None
+_stop_flag = None
+_chunk_counter = None
+_stats_array = None
+
+# 随机抽样模式每批验证的候选布局数
+SAMPLE_BATCH = 512
+# 种子枚举模式每次领取的连续种子数
+SEED_CHUNK = 2048
+# 共享计数器（有符号64位）中段号的上限，图案总数很大时按比例放大每段的种子数
+MAX_CHUNKS = 1 << 60
+# 空座位枚举模式每次领取的连续组合序号数（每个组合都要回溯一次，段要小得多）
+EMPTY_CHUNK = 8
+
+
+class SharedStopFlag:
+    """跨进程共享的停止标志（共享内存中的单字节），接口与 threading.Event 相同"""
+
+    def __init__(self, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        self._value = ctx.RawValue('b', 0)
+
+    def is_set(self):
+        return self._value.value != 0
+
+    def set(self):
+        self._value.value = 1
+
+    def clear(self):
+        self._value.value = 0
+
+
+def _init_worker(types, room, stop_flag, chunk_counter, stats_array):
+    """工作进程初始化：名单和座位图只传输一次，座位图在进程内编译一次"""
+    global _types, _graph, _stop_flag, _chunk_counter, _stats_array
+    _types = types
+    _graph = room.compile()
+    _stop_flag = stop_flag
+    _chunk_counter = chunk_counter
+    _stats_array = stats_array
+
+
+def _solve_task(mode, seed, index, time_limit=None):
+    """在工作进程中搜索，返回 (种子, 座位→学生索引列表, 是否已穷尽)
+
+    index 为该任务在统计数组中的行号；time_limit 为 pattern 模式的时间上限（秒）。
+    """
+    rng = random.Random(seed)
+    stats = WorkerStats(_stats_array, index)
+    if mode == 'backtrack':
+        solver = BacktrackingSolver(_types, _graph, stop_event=_stop_flag, stats=stats)
+        assignment = solver.solve(rng)
+        exhausted = assignment is None and not _stop_flag.is_set()
+    elif mode == 'random':
+        assignment = sample_until_valid(_types, _graph, np.random.default_rng(seed),
+                                        _stop_flag, stats)
+        exhausted = False
+    elif mode == 'seed':
+        seed, assignment = _scan_seed_chunks(seed, stats)
+        exhausted = assignment is None and not _stop_flag.is_set()
+    elif mode == 'pattern':
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        seed, assignment, exhausted = _scan_pattern_chunks(seed, stats, deadline)
+    elif mode == 'empty':
+        seed, assignment = _scan_empty_chunks(seed, stats)
+        exhausted = assignment is None and not _stop_flag.is_set()
+    else:
+        raise ValueError(f"未知的排列模式：{mode}")
+
+    if assignment is not None:
+        _stop_flag.set()
+    return seed, assignment, exhausted
+
+
+def _record_batch(stats, count, generated_at, validated_at, rejections):
+    """记录一批候选的统计并写入共享内存"""
+    finished = time.perf_counter()
+    stats.generated += count
+    stats.validated += count
+    stats.generation_seconds += validated_at - generated_at
+    stats.validation_seconds += finished - validated_at
+    for rule, rejected in rejections.items():
+        stats.reject(RULES.index(rule), rejected)
+    stats.flush()
+
+
+def sample_until_valid(types, graph, generator, stop_event, stats):
+    """随机抽样：成批打乱后用向量化验证器一次验证整批，直到找到合法布局或 stop_event 被设置"""
+    seat_count = graph.seat_count
+    n = len(types)
+    base = np.array(list(types) + [EMPTY] * (seat_count - n), dtype=np.int8)
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        perms = np.argsort(generator.random((SAMPLE_BATCH, seat_count)), axis=1)
+        values = base[perms]
+        generated = time.perf_counter()
+        valid, rejections = rule_rejections(values, graph)
+        _record_batch(stats, SAMPLE_BATCH, started, generated, rejections)
+        hits = np.flatnonzero(valid)
+        if hits.size:
+            perm = perms[hits[0]]
+            return [int(p) if p < n else None for p in perm]
+    return None
+
+
+def _claim_chunk():
+    """领取下一段连续种子，每段只加一次锁"""
+    with _chunk_counter.get_lock():
+        index = _chunk_counter.value
+        _chunk_counter.value += 1
+    return index
+
+
+def _skip_chunks(index):
+    """把共享计数器推进到第 index 段（之前的段已确定没有解）"""
+    with _chunk_counter.get_lock():
+        if _chunk_counter.value < index:
+            _chunk_counter.value = index
+
+
+def pattern_chunk(total):
+    """pattern 模式每段的种子数：至少 SEED_CHUNK，段数不超过 MAX_CHUNKS"""
+    return max(SEED_CHUNK, -(-total // MAX_CHUNKS))
+
+
+def _scan_chunks(start, total, decode_chunk, stats):
+    """从 start 开始按段领取种子，逐段解码为各座位的类型并批量验证
+
+    decode_chunk(起始种子, 个数) 返回 (种子列表, 类型数组 (个数, 座位数), 转换函数)，
+    转换函数把命中的下标变为 座位→学生索引列表。
+    """
+    while not _stop_flag.is_set():
+        offset = _claim_chunk() * SEED_CHUNK
+        if offset >= total:
+            return None, None
+        count = min(SEED_CHUNK, total - offset)
+        started = time.perf_counter()
+        seeds, values, to_assignment = decode_chunk(start + offset, count)
+        generated = time.perf_counter()
+        valid, rejections = rule_rejections(values, _graph)
+        _record_batch(stats, count, started, generated, rejections)
+        hits = np.flatnonzero(valid)
+        if hits.size:
+            return seeds[hits[0]], to_assignment(hits[0])
+    return None, None
+
+
+def _scan_seed_chunks(start, stats):
+    """种子枚举：种子解码为 n! 个姓名排列之一
+
+    学生按排列顺序依次坐入座位图的座位，空座位留在最后，与 ClassroomService.layout_from_seed 一致。
+    """
+    seat_count = _graph.seat_count
+    n = len(_types)
+    types = np.array(_types, dtype=np.int8)
+
+    def decode_chunk(first, count):
+        seeds, perms = zip(*iter_seed_range(first, count, n))
+        perms = np.array(perms, dtype=np.intp)
+        values = np.full((count, seat_count), EMPTY, dtype=np.int8)
+        values[:, :n] = types[perms]
+        return seeds, values, lambda i: [int(p) for p in perms[i]] + [None] * (seat_count - n)
+
+    return _scan_chunks(start, math.factorial(n), decode_chunk, stats)
+
+
+def _scan_pattern_chunks(start, stats, deadline=None):
+    """类型图案枚举：种子解码为类型的多重集合排列，同类型学生不再重复枚举
+
+    每段种子由 PatternScanner 按前缀剪枝扫描；段末的失败前缀覆盖到后面的段时，
+    把共享计数器直接推进过去，其他进程不再逐段领取这些已确定无解的种子。
+    命中后按种子把同类型学生打乱填入，与 ClassroomService.layout_from_pattern 一致。
+    返回 (种子, 座位→学生索引列表, 是否已穷尽)。
+    """
+    scanner = PatternScanner(_types, _graph, stop_event=_stop_flag, deadline=deadline,
+                             stats=stats)
+    total = scanner.total
+    chunk = pattern_chunk(total)
+    while not scanner.stopped():
+        offset = _claim_chunk() * chunk
+        if offset >= total:
+            return None, None, True
+        first = (start + offset) % total
+        end = first + min(chunk, total - offset)
+        # 超出总数的部分回绕到0（offset 与种子的对应关系：种子 = (start + offset) % total）
+        parts = [(first, min(end, total), first < start)]
+        if end > total:
+            parts.append((0, end - total, True))
+        for low, high, wrapped in parts:
+            seed, found = scanner.scan(low, high)
+            if seed is not None:
+                return seed, assign_students(found, _types, seed), False
+        # 此时 found 为段末之后已确定无解的种子上界，换算为 offset 后跳过其中的整段
+        skipped = found - start if not wrapped else min(total, found + total - start)
+        _skip_chunks(skipped // chunk)
+    return None, None, False
+
+
+def empty_subset_total(types, seat_count):
+    """空座位子集的总数 C(座位数, 空座位数)（empty 模式的序号上限）"""
+    return math.comb(seat_count, seat_count - len(types))
+
+
+def _scan_empty_chunks(start, stats):
+    """空座位枚举：序号按组合数系统解码为空座位子集，其余座位由回溯求解器排入学生
+
+    各进程通过共享计数器领取互不重叠的序号段，不需要记录已尝试过的子集，
+    内存占用与运行时间无关。序号 r 的子集用 random.Random(r) 回溯，
+    与 ClassroomService.layout_from_empty 一致。
+    """
+    seat_count = _graph.seat_count
+    k = seat_count - len(_types)
+    total = empty_subset_total(_types, seat_count)
+    solver = BacktrackingSolver(_types, _graph, stop_event=_stop_flag, stats=stats)
+    while not _stop_flag.is_set():
+        offset = _claim_chunk() * EMPTY_CHUNK
+        if offset >= total:
+            return None, None
+        count = min(EMPTY_CHUNK, total - offset)
+        for rank, empty in iter_combination_range(start + offset, count, seat_count, k):
+            assignment = solver.solve(random.Random(rank), empty)
+            if assignment is not None:
+                return rank, assignment
+            if _stop_flag.is_set():
+                break
+    return None, None
+
+
+def _engine_task(solve, seed, index, time_limit):
+    """在工作进程中运行组合中的一个引擎，返回 (种子, 座位→学生索引列表或 None)"""
+    stats = WorkerStats(_stats_array, index)
+    assignment = solve(_types, _graph, seed, _stop_flag, stats, time_limit)
+    stats.flush()
+    if assignment is not None:
+        _stop_flag.set()
+    return seed, assignment
+
+
+def race_engines(types, room, entries, time_limit, stop_event=None, stats=None, poll=0.02):
+    """每个引擎一个进程同时搜索，返回最先找到的 (引擎名, 种子, 座位→学生索引列表)
+
+    entries 为 [(引擎名, 求解函数, 种子, 是否完备), ...]，求解函数见 engines.register_engine。
+    第一个找到合法布局的进程通过共享标志通知其他进程停止；完备引擎（回溯）找不到
+    说明无解，也立即停止。全部失败、超过 time_limit 秒或被中止时返回 None。
+    stats 为可选的 SearchStats（至少 len(entries) 行）。
+    """
+    ctx = multiprocessing.get_context()
+    stop_flag = SharedStopFlag(ctx)
+    stats = stats or SearchStats(len(entries), ctx)
+    executor = ProcessPoolExecutor(
+        max_workers=len(entries),
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(types, room, stop_flag, ctx.Value('q', 0), stats.array)
+    )
+    deadline = time.monotonic() + time_limit
+    try:
+        pending = {executor.submit(_engine_task, solve, seed, i, time_limit): (name, complete)
+                   for i, (name, solve, seed, complete) in enumerate(entries)}
+        while pending:
+            done, _ = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            if (stop_event is not None and stop_event.is_set()) or time.monotonic() >= deadline:
+                stop_flag.set()
+            for future in done:
+                name, complete = pending.pop(future)
+                task_seed, assignment = future.result()
+                if assignment is not None:
+                    stop_flag.set()
+                    return name, task_seed, assignment
+                if complete and not stop_flag.is_set():
+                    stop_flag.set()
+                    return None
+        return None
+    finally:
+        stop_flag.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def solve_in_processes(types, room, mode, seed, workers, stop_event=None, stats=None,
+                       poll=0.02, progress=None, time_limit=None):
+    """多进程并行搜索，返回第一个找到的 (种子, 座位→学生索引列表)，无解或被中止返回 None
+
+    每个进程使用不同的种子（seed, seed+1, ...，对 n! 取模，仍在界面允许的种子范围内），
+    第一个找到解的进程通过共享标志通知其他进程停止。backtrack 模式返回的种子在单进程
+    回溯中可复现同一布局。'seed'、'pattern' 和 'empty' 模式下所有进程共用起点 seed，
+    通过共享计数器领取互不重叠的连续种子段（empty 模式的种子为空座位子集的组合序号），
+    可用 ClassroomService.layout_from_seed/layout_from_pattern/layout_from_empty 复现。
+    stop_event 为调用方的中止事件，会同步到共享标志。
+    stats 为可选的 SearchStats（至少 workers 行），各进程把计数写入其中。
+    room 为 RoomMap，返回的列表按其编译后的座位编号排列。
+    progress 为可选的进度回调（0-100），'seed'、'pattern' 和 'empty' 模式按已领取的
+    种子段占种子总数的比例报告。
+    time_limit 为时间上限（秒）：到时设置共享停止标志，所有模式都停止并返回 None；
+    None 表示不限。
+    """
+    ctx = multiprocessing.get_context()
+    stop_flag = SharedStopFlag(ctx)
+    chunk_counter = ctx.Value('q', 0)
+    stats = stats or SearchStats(workers, ctx)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(types, room, stop_flag, chunk_counter, stats.array)
+    )
+    try:
+        if mode in ('seed', 'pattern', 'empty'):
+            seeds = [seed] * workers
+            chunk = EMPTY_CHUNK if mode == 'empty' else SEED_CHUNK
+            if mode == 'seed':
+                total = math.factorial(len(types))
+            elif mode == 'pattern':
+                total = pattern_total(types, room.seat_count)
+                chunk = pattern_chunk(total)
+            else:
+                total = empty_subset_total(types, room.seat_count)
+        else:
+            limit = math.factorial(len(types))
+            seeds = [(seed + i) % limit for i in range(workers)]
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        pending = {executor.submit(_solve_task, mode, s, i, time_limit)
+                   for i, s in enumerate(seeds)}
+        while pending:
+            done, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            if ((stop_event is not None and stop_event.is_set())
+                    or (deadline is not None and time.monotonic() >= deadline)):
+                stop_flag.set()
+            if progress is not None and mode in ('seed', 'pattern', 'empty'):
+                progress(min(100.0, chunk_counter.value * chunk * 100 / total))
+            for future in done:
+                task_seed, assignment, exhausted = future.result()
+                if assignment is not None:
+                    stop_flag.set()
+                    return task_seed, assignment
+                if exhausted and mode == 'backtrack':
+                    # 回溯已穷尽整个搜索空间，其他进程也不可能找到解；
+                    # 枚举模式下某个进程领不到新种子段时，其他进程可能仍在验证最后几段
+                    stop_flag.set()
+                    return None
+        return None
+    finally:
+        stop_flag.set()
+        executor.shutdown(wait=True, cancel_futures=True)
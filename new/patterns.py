@@ -0,0 +1,162 @@
+# patterns.py
+"""按类型排列搜索（对称性约简）
+
+排座规则只与学生类型有关、与姓名无关，同类型的学生可以互换。因此先在
+“类型图案”（每个座位上的类型 1/0/-1/-2 或空座位）中搜索，搜索空间比 n! 个
+姓名排列小 (各类型人数的阶乘之积) 倍；找到有效图案后再用种子打乱同类型学生，
+把姓名填入对应座位。
+"""
+import random
+import time
+
+from ranking import multiset_count, unrank_multiset
+from stats import TALK_ADJACENT, SERIOUS_NEARBY, SERIOUS_UNSUPERVISED
+from validator import EMPTY
+
+
+def pattern_counts(types, seat_count):
+    """类型图案中各类型的座位数，空座位记为 EMPTY"""
+    counts = {}
+    for t in types:
+        counts[t] = counts.get(t, 0) + 1
+    if seat_count > len(types):
+        counts[EMPTY] = seat_count - len(types)
+    return counts
+
+
+def pattern_total(types, seat_count):
+    """不同类型图案的总数"""
+    return multiset_count(pattern_counts(types, seat_count))
+
+
+def unrank_pattern(seed, types, seat_count):
+    """由种子解码出类型图案（每个座位一个类型，按行优先顺序）"""
+    return unrank_multiset(seed, pattern_counts(types, seat_count))
+
+
+def assign_students(pattern, types, seed):
+    """把学生填入类型图案：同类型学生按种子打乱后依次就座
+
+    返回 每个座位对应的学生索引列表（None 表示空座位）。同一图案和种子总是得到同一结果。
+    """
+    rng = random.Random(seed)
+    groups = {}
+    for idx, t in enumerate(types):
+        groups.setdefault(t, []).append(idx)
+    for group in groups.values():
+        rng.shuffle(group)
+    queues = {t: iter(group) for t, group in groups.items()}
+    return [None if t == EMPTY else next(queues[t]) for t in pattern]
+
+
+class PatternScanner:
+    """按种子（字典序序号）扫描类型图案，前缀违反规则时整体跳过以它开头的所有图案
+
+    放好第 k 个座位后只检查前 k 个座位已能确定的规则：-1、-2 与前面座位的冲突，
+    以及2格内座位都已放好却没有好学生的 -2。前缀失败时跳过的序号数为其余座位的
+    多重集合排列数，因此搜索量取决于合法前缀的数量，而不是种子区间的长度。
+    结果与逐个种子验证完全相同：返回区间中第一个合法图案的种子。
+    """
+
+    CHECK_EVERY = 4096  # 每放置多少个节点检查一次停止标志和时间上限
+
+    def __init__(self, types, graph, stop_event=None, deadline=None, stats=None):
+        self.n = graph.seat_count
+        self.counts = dict(sorted(pattern_counts(types, self.n).items()))
+        self.total = multiset_count(self.counts)
+        self.near1 = graph.near1.lists
+        self.near2 = graph.near2.lists
+        # closes[k]：2格内最大座位编号为 k 的座位，放好座位 k 后即可判断它有没有好学生管理
+        self.closes = [[] for _ in range(self.n)]
+        for seat in range(self.n):
+            self.closes[max(seat, *self.near2[seat])].append(seat)
+        self.stop_event = stop_event
+        self.deadline = deadline  # time.monotonic() 的截止时间，None 表示不限
+        self.stats = stats  # 可选的 WorkerStats
+        self.nodes = 0
+
+    def stopped(self):
+        return ((self.stop_event is not None and self.stop_event.is_set())
+                or (self.deadline is not None and time.monotonic() >= self.deadline))
+
+    def scan(self, first, last):
+        """在种子区间 [first, last) 中找第一个合法图案，返回 (种子, 图案)
+
+        找不到时返回 (None, resume)：[last, resume) 中的种子也已确定不合法
+        （它们与区间末尾的某个失败前缀相同），调用方可以直接跳到 resume。
+        被中止或超时时返回 (None, last)。
+        """
+        self.first, self.last, self.resume = first, last, last
+        self.pattern = [None] * self.n
+        self.good2 = [0] * self.n
+        self.remaining = dict(self.counts)
+        self.halted = False
+        seed = self._search(0, 0, self.total)
+        if self.stats:
+            self.stats.flush()
+        if seed is None:
+            return None, (last if self.halted else self.resume)
+        return seed, list(self.pattern)
+
+    def _search(self, seat, base, block):
+        """在座位 seat 上依次尝试各类型；base、block 为当前前缀的第一个种子和补全数"""
+        if seat == self.n:
+            return base
+        left = self.n - seat
+        for value, count in self.remaining.items():
+            if not count:
+                continue
+            size = block * count // left
+            low, base = base, base + size
+            if base <= self.first:
+                continue
+            if low >= self.last:
+                return None
+            self.nodes += 1
+            if self.nodes % self.CHECK_EVERY == 0 and self.stopped():
+                self.halted = True
+                return None
+            self._place(seat, value)
+            rule = self._conflict(seat, value)
+            if self.stats:
+                self.stats.generated += 1
+                self.stats.validated += 1
+            if rule is None:
+                found = self._search(seat + 1, low, size)
+                if found is not None:
+                    return found
+                if self.halted:
+                    return None
+            else:
+                if self.stats:
+                    self.stats.reject(rule)
+                if base > self.last:
+                    self.resume = max(self.resume, base)
+            self._remove(seat, value)
+        return None
+
+    def _place(self, seat, value):
+        self.pattern[seat] = value
+        self.remaining[value] -= 1
+        if value == 1:
+            for q in self.near2[seat]:
+                self.good2[q] += 1
+
+    def _remove(self, seat, value):
+        self.pattern[seat] = None
+        self.remaining[value] += 1
+        if value == 1:
+            for q in self.near2[seat]:
+                self.good2[q] -= 1
+
+    def _conflict(self, seat, value):
+        """新放置的座位使前缀违反的规则（stats 中的编号），没有时为 None"""
+        pattern = self.pattern
+        if value == -1 and any(pattern[q] == -1 for q in self.near1[seat]):
+            return TALK_ADJACENT
+        if value == -2 and any(pattern[q] == -2 for q in self.near2[seat]):
+            return SERIOUS_NEARBY
+        for s in self.closes[seat]:
+            if pattern[s] == -2 and self.good2[s] == 0:
+                return SERIOUS_UNSUPERVISED
+        return None
@@ -0,0 +1,207 @@
+# ranking.py
+import math
+
+
+def _fenwick_ones(n):
+    """所有位置都为1的树状数组（下标从1开始）"""
+    return [0] + [i & -i for i in range(1, n + 1)]
+
+
+def _fenwick_select(tree, n, k):
+    """在树状数组中找到第 k 个（从0开始）仍存在的元素，并将其删除"""
+    pos = 0
+    mask = 1 << n.bit_length()
+    while mask:
+        nxt = pos + mask
+        if nxt <= n and tree[nxt] <= k:
+            pos = nxt
+            k -= tree[nxt]
+        mask >>= 1
+    i = pos + 1
+    while i <= n:
+        tree[i] -= 1
+        i += i & -i
+    return pos
+
+
+def _fenwick_count_before(tree, value):
+    """统计小于 value 的仍存在元素个数"""
+    total = 0
+    i = value
+    while i > 0:
+        total += tree[i]
+        i -= i & -i
+    return total
+
+
+def unrank_permutation(seed, n):
+    """把种子（0 <= seed < n!）映射为 0..n-1 的排列（Lehmer码，字典序）
+
+    先将种子分解为阶乘进制数字，再用树状数组逐位选出剩余元素中的第 k 小，
+    整体为 O(n log n)。
+    """
+    if not 0 <= seed < math.factorial(n):
+        raise ValueError(f"种子必须在 0 到 {n}!-1 之间")
+    digits = [0] * n
+    for base in range(1, n + 1):
+        seed, digits[n - base] = divmod(seed, base)
+
+    tree = _fenwick_ones(n)
+    return [_fenwick_select(tree, n, d) for d in digits]
+
+
+def rank_permutation(perm):
+    """unrank_permutation 的逆运算：由排列求种子"""
+    n = len(perm)
+    tree = _fenwick_ones(n)
+    seed = 0
+    for k, value in enumerate(perm):
+        smaller = _fenwick_count_before(tree, value)
+        seed = seed * (n - k) + smaller
+        i = value + 1
+        while i <= n:
+            tree[i] -= 1
+            i += i & -i
+    return seed
+
+
+def next_permutation(perm):
+    """原地变为字典序的下一个排列，已是最后一个时回到第一个，返回是否发生回绕"""
+    i = len(perm) - 2
+    while i >= 0 and perm[i] >= perm[i + 1]:
+        i -= 1
+    if i < 0:
+        perm.reverse()
+        return True
+    j = len(perm) - 1
+    while perm[j] <= perm[i]:
+        j -= 1
+    perm[i], perm[j] = perm[j], perm[i]
+    perm[i + 1:] = reversed(perm[i + 1:])
+    return False
+
+
+def iter_seed_range(start, count, n):
+    """按顺序生成从 start 开始的 count 个种子对应的排列（超出 n! 时回绕到0）
+
+    只对起点做一次解码，之后用 next_permutation 逐个推进。
+    """
+    total = math.factorial(n)
+    perm = unrank_permutation(start % total, n)
+    for k in range(min(count, total)):
+        yield (start + k) % total, tuple(perm)
+        next_permutation(perm)
+
+
+def multiset_count(counts):
+    """多重集合排列数 n! / (c1! c2! ...)，counts 为 {元素: 个数}"""
+    total = math.factorial(sum(counts.values()))
+    for c in counts.values():
+        total //= math.factorial(c)
+    return total
+
+
+def unrank_multiset(seed, counts):
+    """把种子（0 <= seed < multiset_count(counts)）映射为多重集合的第 seed 个排列（字典序）
+
+    同类元素互不区分，因此搜索空间比 n! 小 c1! c2! ... 倍。
+    每一位按元素从小到大依次扣除以该元素开头的排列数，整体为 O(n·k)，k 为元素种类数。
+    """
+    remaining = {v: c for v, c in sorted(counts.items()) if c > 0}
+    total = multiset_count(remaining)
+    if not 0 <= seed < total:
+        raise ValueError(f"种子必须在 0 到 {total - 1} 之间")
+    n = sum(remaining.values())
+    result = []
+    for left in range(n, 0, -1):
+        for value, c in remaining.items():
+            block = total * c // left
+            if seed < block:
+                break
+            seed -= block
+        result.append(value)
+        total = block
+        if c == 1:
+            del remaining[value]
+        else:
+            remaining[value] = c - 1
+    return result
+
+
+def rank_multiset(seq):
+    """unrank_multiset 的逆运算：由多重集合排列求种子"""
+    remaining = {}
+    for value in seq:
+        remaining[value] = remaining.get(value, 0) + 1
+    remaining = dict(sorted(remaining.items()))
+    total = multiset_count(remaining)
+    seed = 0
+    for left, value in zip(range(len(seq), 0, -1), seq):
+        for other, c in remaining.items():
+            if other == value:
+                break
+            seed += total * c // left
+        total = total * remaining[value] // left
+        remaining[value] -= 1
+    return seed
+
+
+def iter_multiset_range(start, count, counts):
+    """按顺序生成从 start 开始的 count 个种子对应的多重集合排列（超出总数时回绕到0）
+
+    next_permutation 对含重复元素的序列同样按字典序推进，且不会产生重复排列。
+    """
+    total = multiset_count(counts)
+    perm = unrank_multiset(start % total, counts)
+    for k in range(min(count, total)):
+        yield (start + k) % total, tuple(perm)
+        next_permutation(perm)
+
+
+def unrank_combination(rank, n, k):
+    """组合数系统：把 rank（0 <= rank < C(n, k)）映射为 0..n-1 中的 k 元子集
+
+    返回递增元组 (c1 < c2 < ... < ck)，满足 rank = C(c1, 1) + C(c2, 2) + ... + C(ck, k)
+    （colex 顺序）。从最高位起每位取满足 C(c, i) <= rank 的最大 c，整体为 O(n)。
+    """
+    if not 0 <= rank < math.comb(n, k):
+        raise ValueError(f"序号必须在 0 到 C({n}, {k})-1 之间")
+    combo = [0] * k
+    c = n
+    for i in range(k, 0, -1):
+        c -= 1
+        while math.comb(c, i) > rank:
+            c -= 1
+        combo[i - 1] = c
+        rank -= math.comb(c, i)
+    return tuple(combo)
+
+
+def rank_combination(combo):
+    """unrank_combination 的逆运算：由 k 元子集求序号"""
+    return sum(math.comb(c, i) for i, c in enumerate(sorted(combo), 1))
+
+
+def next_combination(combo, n):
+    """原地变为 colex 顺序的下一个 k 元子集，已是最后一个时回到第一个，返回是否发生回绕"""
+    k = len(combo)
+    for i in range(k):
+        limit = combo[i + 1] if i + 1 < k else n
+        if combo[i] + 1 < limit:
+            combo[i] += 1
+            combo[:i] = range(i)
+            return False
+    combo[:] = range(k)
+    return True
+
+
+def iter_combination_range(start, count, n, k):
+    """按顺序生成从 start 开始的 count 个 (序号, k 元子集)（超出 C(n, k) 时回绕到0）
+
+    只对起点做一次解码，之后用 next_combination 逐个推进，每步均摊 O(1)。
+    """
+    total = math.comb(n, k)
+    combo = list(unrank_combination(start % total, n, k))
+    for i in range(min(count, total)):
+        yield (start + i) % total, tuple(combo)
+        next_combination(combo, n)
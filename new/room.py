@@ -0,0 +1,155 @@
+# room.py
+"""教室座位图
+
+座位图是 rows×cols 网格上的可用座位掩码（过道、柱子等不可用位置为 False）
+加上邻接定义（neighbors.SHAPES）。距离按网格坐标计算，因此隔着过道的两人
+并不相邻。座位图编译为 SeatGraph 后，所有引擎只在可用座位的编号上工作。
+
+文本格式每行一排，'O' 为座位，'.' 为过道或不可用位置，例如：
+
+    OO.OOO.OO
+    OO.OOO.OO
+    ...OOO...
+"""
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from neighbors import SHAPES, NeighborTable, get_neighbor_table
+
+SEAT = 'O'
+BLOCKED = '.'
+
+
+class RoomMap:
+    """教室座位图：usable 为按行优先排列的可用标记，shape 为邻域形状"""
+
+    __slots__ = ('rows', 'cols', 'usable', 'shape')
+
+    def __init__(self, rows, cols, usable=None, shape='square'):
+        if rows <= 0 or cols <= 0:
+            raise ValueError("座位图的行数和列数必须为正数")
+        if shape not in SHAPES:
+            raise ValueError(f"未知的邻域形状：{shape}")
+        usable = (True,) * (rows * cols) if usable is None else tuple(bool(u) for u in usable)
+        if len(usable) != rows * cols:
+            raise ValueError("座位掩码的大小与行列数不一致")
+        self.rows = rows
+        self.cols = cols
+        self.usable = usable
+        self.shape = shape
+
+    @classmethod
+    def rectangle(cls, rows, cols, shape='square'):
+        return cls(rows, cols, shape=shape)
+
+    @classmethod
+    def from_lines(cls, lines, shape='square'):
+        """由文本行创建（'O' 为座位，其他字符为不可用位置，短行在右侧补齐）"""
+        lines = [line.rstrip() for line in lines]
+        while lines and not lines[-1]:
+            lines.pop()
+        if not lines:
+            raise ValueError("座位图为空")
+        cols = max(len(line) for line in lines)
+        usable = [ch.upper() == SEAT for line in lines for ch in line.ljust(cols, BLOCKED)]
+        return cls(len(lines), cols, usable, shape)
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 JSON 对象创建：{"map": ["OO.OO", ...], "shape": "square"}
+        或 {"rows": 6, "cols": 8, "blocked": [[行, 列], ...]}（行列从0开始）"""
+        shape = data.get('shape', 'square')
+        if 'map' in data:
+            return cls.from_lines(data['map'], shape)
+        rows, cols = int(data['rows']), int(data['cols'])
+        usable = [True] * (rows * cols)
+        for row, col in data.get('blocked', ()):
+            if not (0 <= row < rows and 0 <= col < cols):
+                raise ValueError(f"不可用位置 ({row}, {col}) 超出座位图范围")
+            usable[row * cols + col] = False
+        return cls(rows, cols, usable, shape)
+
+    @classmethod
+    def load(cls, path):
+        """从 JSON 文件读取座位图"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {'map': self.lines(), 'shape': self.shape}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def lines(self):
+        return [''.join(SEAT if u else BLOCKED for u in self.usable[r * self.cols:(r + 1) * self.cols])
+                for r in range(self.rows)]
+
+    @property
+    def seat_count(self):
+        return sum(self.usable)
+
+    def compile(self):
+        """编译（并缓存）为 SeatGraph"""
+        return get_seat_graph(self)
+
+    def _key(self):
+        return self.rows, self.cols, self.usable, self.shape
+
+    def __eq__(self, other):
+        return isinstance(other, RoomMap) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"RoomMap({self.rows}×{self.cols}, {self.seat_count}个座位, {self.shape})"
+
+
+class SeatGraph:
+    """编译后的座位图：可用座位按行优先编号为 0..seat_count-1
+
+    positions[s] 为座位 s 的 (行, 列)；near1/near2 为只包含可用座位的
+    1格/2格邻居表（NeighborTable，编号为座位编号）。
+    """
+
+    __slots__ = ('rows', 'cols', 'shape', 'seat_count', 'positions', 'cells', 'near1', 'near2')
+
+    def __init__(self, room):
+        self.rows = room.rows
+        self.cols = room.cols
+        self.shape = room.shape
+        self.cells = np.flatnonzero(room.usable).astype(np.intp)
+        self.seat_count = len(self.cells)
+        self.positions = tuple(divmod(int(cell), room.cols) for cell in self.cells)
+        seat_of_cell = {int(cell): seat for seat, cell in enumerate(self.cells)}
+        self.near1 = self._table(seat_of_cell, 1)
+        self.near2 = self._table(seat_of_cell, 2)
+
+    def _table(self, seat_of_cell, distance):
+        grid = get_neighbor_table(self.rows, self.cols, distance, self.shape)
+        lists = tuple(tuple(seat_of_cell[q] for q in grid.lists[cell] if q in seat_of_cell)
+                      for cell in map(int, self.cells))
+        return NeighborTable(self.rows, self.cols, distance, self.shape, lists)
+
+    def to_grid(self, values, fill):
+        """把每个座位一个值的列表展开为 rows×cols 的二维列表，不可用位置填 fill"""
+        grid = [[fill] * self.cols for _ in range(self.rows)]
+        for (row, col), value in zip(self.positions, values):
+            grid[row][col] = value
+        return grid
+
+
+@lru_cache(maxsize=64)
+def get_seat_graph(room):
+    """获取（并缓存）座位图编译后的 SeatGraph"""
+    return SeatGraph(room)
+
+
+@lru_cache(maxsize=64)
+def rectangle_graph(rows, cols, shape='square'):
+    """完整矩形网格的座位图（座位编号即 row * cols + col）"""
+    return get_seat_graph(RoomMap.rectangle(rows, cols, shape))
@@ -0,0 +1,62 @@
+# roster.py
+import sys
+from array import array
+
+
+class Roster:
+    """紧凑名单：驻留的姓名表 + array('b') 类型向量
+
+    搜索过程只处理学生的整数索引和类型向量，姓名只在生成座位表时才被读取。
+    迭代和下标访问会临时生成 {'name', 'type'} 字典，供界面和导出使用。
+    keys 为忽略大小写的姓名索引（casefold 后的姓名 → 首次出现的位置），查重为 O(1)。
+    """
+
+    __slots__ = ('names', 'types', 'keys')
+
+    def __init__(self, students=()):
+        self.names = []
+        self.types = array('b')
+        self.keys = {}
+        for student in students:
+            self.append(student['name'], student['type'])
+
+    @staticmethod
+    def name_key(name):
+        """查重用的姓名键（忽略大小写）"""
+        return name.casefold()
+
+    def append(self, name, student_type):
+        self.keys.setdefault(self.name_key(name), len(self.names))
+        self.names.append(sys.intern(name))
+        self.types.append(student_type)
+
+    def extend(self, students):
+        """一次追加多名学生（[(姓名, 类型), ...]）"""
+        for name, student_type in students:
+            self.append(name, student_type)
+
+    def copy(self):
+        """生成快照，搜索期间名单被修改也不受影响"""
+        roster = Roster()
+        roster.names = list(self.names)
+        roster.types = array('b', self.types)
+        roster.keys = dict(self.keys)
+        return roster
+
+    def __contains__(self, name):
+        """名单中是否已有同名（忽略大小写）的学生"""
+        return self.name_key(name) in self.keys
+
+    def to_dicts(self):
+        """转换为 JSON 可序列化的字典列表"""
+        return [{'name': name, 'type': t} for name, t in zip(self.names, self.types)]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for name, t in zip(self.names, self.types):
+            yield {'name': name, 'type': t}
+
+    def __getitem__(self, index):
+        return {'name': self.names[index], 'type': self.types[index]}
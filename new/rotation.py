@@ -0,0 +1,189 @@
+# rotation.py
+"""多周轮换座位：每周换一次座位，整个学期内尽量不与同一个人第二次相邻
+
+第一周用回溯求解器得到合法布局，之后每一周都从上一周的布局出发（热启动）：
+先在每种类型内部打乱学生（类型图案不变，硬性规则自动满足），再用局部搜索
+交换座位，减少与历史上已相邻过的同学再次相邻的对数。跨类型的交换由
+IncrementalEvaluator 检查，只接受不破坏硬性规则的交换。
+"""
+import math
+import random
+import time
+
+from evaluator import IncrementalEvaluator
+from validator import EMPTY
+
+# 相邻的定义：'row' 为同一排左右相邻（同桌），'square' 为周围一圈（见 room.SeatGraph.near1）
+ADJACENCY = ('row', 'square')
+
+
+def adjacent_seats(graph, adjacency='row'):
+    """每个座位的相邻座位列表（按座位图 graph 的编号）"""
+    if adjacency == 'square':
+        return graph.near1.lists
+    if adjacency != 'row':
+        raise ValueError(f"未知的相邻定义：{adjacency}")
+    seat_at = {position: seat for seat, position in enumerate(graph.positions)}
+    return tuple(tuple(seat_at[(row, col + step)] for step in (-1, 1) if (row, col + step) in seat_at)
+                 for row, col in graph.positions)
+
+
+class PairHistory:
+    """相邻历史：每名学生一个 int 位集，第 j 位为1表示曾与学生 j 相邻（n 名学生共 n² 位）"""
+
+    __slots__ = ('bits',)
+
+    def __init__(self, student_count):
+        self.bits = [0] * student_count
+
+    def met(self, i, j):
+        return (self.bits[i] >> j) & 1
+
+    def add(self, i, j):
+        self.bits[i] |= 1 << j
+        self.bits[j] |= 1 << i
+
+    def record(self, assignment, adjacent):
+        """记录一周布局中所有相邻的学生对"""
+        for seat, student in enumerate(assignment):
+            if student is None:
+                continue
+            for other in adjacent[seat]:
+                if assignment[other] is not None:
+                    self.add(student, assignment[other])
+
+    def partners(self, i):
+        """学生 i 已相邻过的同学数"""
+        return bin(self.bits[i]).count('1')
+
+
+class RotationPlanner:
+    """从合法布局出发逐周生成轮换布局，每周都以上一周为起点
+
+    目标是本周相邻的学生对中“以前已相邻过”的对数（repeats）为0；
+    在步数或时间用完时仍有重复则保留重复最少的布局。
+    """
+
+    STEPS_PER_WEEK = 20000
+    SAMPLE_SIZE = 8          # 每步为重复座位抽样的交换对象数
+    UPHILL = 0.02            # 接受变差一对的交换的概率（跳出局部最优）
+    STALL = 2000             # 连续这么多步没有改进时结束本周（重复已无法避免）
+
+    def __init__(self, types, graph, adjacency='row', stop_event=None, stats=None):
+        self.types = list(types)
+        self.graph = graph
+        self.adjacent = adjacent_seats(graph, adjacency)
+        self.stop_event = stop_event
+        self.stats = stats  # 可选的 WorkerStats
+        self.history = PairHistory(len(self.types))
+
+    def _stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def plan(self, first, weeks, rng=None, time_limit=30.0):
+        """生成 weeks 周的布局，first 为第一周（座位→学生索引列表）
+
+        返回 [(座位→学生索引列表, 与以前重复相邻的对数), ...]，第一周的重复数为0。
+        被中止或超时时返回已生成的周。
+        """
+        rng = rng or random.Random()
+        deadline = time.monotonic() + time_limit
+        schedule = [(list(first), 0)]
+        self.history.record(first, self.adjacent)
+        while len(schedule) < weeks and time.monotonic() < deadline and not self._stopped():
+            assignment, repeats = self._next_week(schedule[-1][0], rng, deadline)
+            self.history.record(assignment, self.adjacent)
+            schedule.append((assignment, repeats))
+        if self.stats:
+            self.stats.flush()
+        return schedule
+
+    def _local(self, seat):
+        """座位上的学生与相邻学生中已相邻过的人数"""
+        student = self.seat_of[seat]
+        if student is None:
+            return 0
+        met = self.history.met
+        return sum(met(student, self.seat_of[q]) for q in self.adjacent[seat]
+                   if self.seat_of[q] is not None)
+
+    def _next_week(self, previous, rng, deadline):
+        seat_of = list(previous)
+        # 热启动：同类型学生互换座位不改变类型图案，上周合法则本周也合法
+        groups = {}
+        for seat, student in enumerate(seat_of):
+            if student is not None:
+                groups.setdefault(self.types[student], []).append(seat)
+        for seats in groups.values():
+            students = [seat_of[s] for s in seats]
+            rng.shuffle(students)
+            for seat, student in zip(seats, students):
+                seat_of[seat] = student
+        self.seat_of = seat_of
+        evaluator = IncrementalEvaluator(
+            [EMPTY if idx is None else self.types[idx] for idx in seat_of], self.graph)
+        grid = evaluator.grid
+
+        local = [self._local(s) for s in range(len(seat_of))]
+        repeats = sum(local) // 2
+        bad = {s for s, count in enumerate(local) if count}
+        best, best_repeats = list(seat_of), repeats
+        seats = len(seat_of)
+        improved = 0
+
+        for step in range(self.STEPS_PER_WEEK):
+            if not bad or step - improved > self.STALL:
+                break
+            if step % 256 == 0 and (time.monotonic() >= deadline or self._stopped()):
+                break
+            a = rng.choice(tuple(bad))
+            move = None
+            for _ in range(self.SAMPLE_SIZE):
+                b = rng.randrange(seats)
+                if b == a or seat_of[b] == seat_of[a]:
+                    continue
+                if self.stats:
+                    self.stats.generated += 1
+                    self.stats.validated += 1
+                if grid[a] != grid[b] and evaluator.swap_delta(a, b) > 0:
+                    if self.stats and evaluator.last_rule is not None:
+                        self.stats.reject(evaluator.last_rule)
+                    continue
+                delta = self._swap_delta(a, b)
+                if move is None or delta < move[1]:
+                    move = (b, delta)
+            if move is None:
+                continue
+            b, delta = move
+            if delta > 0 and rng.random() >= self.UPHILL * math.exp(1 - delta):
+                continue
+            self._swap(a, b, evaluator)
+            for s in {a, b, *self.adjacent[a], *self.adjacent[b]}:
+                local[s] = self._local(s)
+                if local[s]:
+                    bad.add(s)
+                else:
+                    bad.discard(s)
+            repeats += delta
+            if repeats < best_repeats:
+                best, best_repeats = list(seat_of), repeats
+                improved = step
+        return best, best_repeats
+
+    def _pair_count(self, a, b):
+        """座位 a、b 上的学生与各自相邻学生中已相邻过的对数（a、b 相邻时这一对计两次）"""
+        return self._local(a) + self._local(b)
+
+    def _swap_delta(self, a, b):
+        """交换座位 a、b 上的学生后重复相邻对数的变化"""
+        before = self._pair_count(a, b)
+        seat_of = self.seat_of
+        seat_of[a], seat_of[b] = seat_of[b], seat_of[a]
+        after = self._pair_count(a, b)
+        seat_of[a], seat_of[b] = seat_of[b], seat_of[a]
+        return after - before
+
+    def _swap(self, a, b, evaluator):
+        seat_of = self.seat_of
+        seat_of[a], seat_of[b] = seat_of[b], seat_of[a]
+        evaluator.swap(a, b)
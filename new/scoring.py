@@ -0,0 +1,209 @@
+# scoring.py
+"""软约束评分与前 K 个方案的搜索
+
+硬性规则（见 validator）决定布局是否合法，软约束决定合法布局的好坏，分数越低越好：
+- good_spread：周围2格内没有好学生(1)的学生，每人计1分；
+- good_cluster：相距2格以内的两名好学生，每对计1分（与 good_spread 一起让好学生分散均匀）；
+- empty_back：空座位距离最后一排每差一排计1分（空座位尽量留在后排）。
+"""
+import heapq
+import itertools
+import random
+import time
+
+from evaluator import IncrementalEvaluator
+from solver import BacktrackingSolver
+from validator import EMPTY
+
+# 各软约束的默认权重
+WEIGHTS = {'good_spread': 1.0, 'good_cluster': 1.0, 'empty_back': 1.0}
+
+
+class SoftScorer:
+    """增量软约束评分器：grid 为每个座位的类型列表（按座位图 graph 的座位编号）
+
+    交换两个座位时只重新计算两者2格以内的座位，代价与班级大小无关。
+    """
+
+    def __init__(self, grid, graph, weights=None):
+        self.grid = list(grid)
+        self.near2 = graph.near2.lists
+        self.weights = dict(WEIGHTS, **(weights or {}))
+        last_row = max((row for row, _ in graph.positions), default=0)
+        self.rows_ahead = [last_row - row for row, _ in graph.positions]  # 距离最后一排的排数
+
+        self.good2 = [0] * graph.seat_count  # 周围2格内好学生数
+        for seat, t in enumerate(self.grid):
+            if t == 1:
+                for q in self.near2[seat]:
+                    self.good2[q] += 1
+        self.uncovered = sum(self._uncovered(s) for s in range(graph.seat_count))
+        self.clustered = sum(self._clustered(s) for s in range(graph.seat_count))  # 每对计两次
+        self.empty_ahead = sum(self.rows_ahead[s] for s, t in enumerate(self.grid) if t == EMPTY)
+
+    @property
+    def score(self):
+        return (self.weights['good_spread'] * self.uncovered
+                + self.weights['good_cluster'] * self.clustered / 2
+                + self.weights['empty_back'] * self.empty_ahead)
+
+    def _uncovered(self, seat):
+        t = self.grid[seat]
+        return 1 if t != EMPTY and t != 1 and self.good2[seat] == 0 else 0
+
+    def _clustered(self, seat):
+        return self.good2[seat] if self.grid[seat] == 1 else 0
+
+    def swap(self, a, b):
+        """交换两个座位并返回分数的变化"""
+        ta, tb = self.grid[a], self.grid[b]
+        if ta == tb:
+            return 0.0
+        before = self.score
+        seats = {a, b}
+        if ta == 1 or tb == 1:
+            seats.update(self.near2[a])
+            seats.update(self.near2[b])
+        self.uncovered -= sum(self._uncovered(s) for s in seats)
+        self.clustered -= sum(self._clustered(s) for s in seats)
+        for seat, old, new in ((a, ta, tb), (b, tb, ta)):
+            self.grid[seat] = new
+            step = (new == 1) - (old == 1)
+            if step:
+                for q in self.near2[seat]:
+                    self.good2[q] += step
+            self.empty_ahead += ((new == EMPTY) - (old == EMPTY)) * self.rows_ahead[seat]
+        self.uncovered += sum(self._uncovered(s) for s in seats)
+        self.clustered += sum(self._clustered(s) for s in seats)
+        return self.score - before
+
+
+class TopK:
+    """有界堆：只保留分数最低的 k 个互不相同的方案，堆顶是其中最差的一个"""
+
+    def __init__(self, k):
+        if k < 1:
+            raise ValueError("方案数必须为正数")
+        self.k = k
+        self._heap = []   # (-分数, 序号, 键, 方案)
+        self._keys = set()
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def admits(self, score):
+        """分数为 score 的新方案能否进入前 k 个"""
+        return len(self._heap) < self.k or score < -self._heap[0][0]
+
+    def offer(self, score, key, item):
+        """尝试加入方案（key 相同的方案只保留先到的一个），返回是否加入"""
+        if key in self._keys or not self.admits(score):
+            return False
+        entry = (-score, next(self._counter), key, item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            self._keys.discard(heapq.heapreplace(self._heap, entry)[2])
+        self._keys.add(key)
+        return True
+
+    def items(self):
+        """按分数从低到高返回 [(分数, 方案), ...]"""
+        return [(-neg, item) for neg, _, _, item in sorted(self._heap, key=lambda e: (-e[0], e[1]))]
+
+
+class BestLayoutSearch:
+    """在时间或次数预算内搜索多个合法布局，按软约束分数保留最好的 k 个
+
+    每一轮先用回溯求解器找到一个合法布局，再做局部搜索：随机交换两个座位，
+    只接受不破坏硬性规则（IncrementalEvaluator）且不增加软约束分数（SoftScorer）
+    的交换。每个得到的布局都交给 TopK，按类型图案去重（同类型学生互换不算新方案）。
+    """
+
+    IMPROVE_STEPS = 2000  # 每个合法布局上的局部搜索步数
+
+    def __init__(self, types, graph, k=5, weights=None, stop_event=None, stats=None):
+        self.types = list(types)
+        self.graph = graph
+        self.weights = weights
+        self.stop_event = stop_event
+        self.stats = stats  # 可选的 WorkerStats
+        self.top = TopK(k)
+        self.attempts = 0
+        self.best_score = None
+
+    def _stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def run(self, rng=None, time_limit=10.0, max_attempts=None):
+        """搜索直到用完 time_limit 秒或 max_attempts 次回溯，返回 [(分数, 座位→学生索引列表), ...]"""
+        for _ in self.improvements(rng, time_limit, max_attempts):
+            pass
+        return self.top.items()
+
+    def improvements(self, rng=None, time_limit=10.0, max_attempts=None):
+        """与 run 相同的搜索，但每找到一个分数更低的方案就产出 (分数, 座位→学生索引列表)
+
+        第一个合法布局立即产出，调用方可以先显示它，再随搜索继续逐步替换。
+        """
+        rng = rng or random.Random()
+        deadline = time.monotonic() + time_limit
+        self.attempts = 0
+        self.best_score = None
+        solver = BacktrackingSolver(self.types, self.graph, stop_event=self.stop_event,
+                                    stats=self.stats)
+        try:
+            while time.monotonic() < deadline and not self._stopped():
+                if max_attempts is not None and self.attempts >= max_attempts:
+                    break
+                self.attempts += 1
+                assignment = solver.solve(rng)
+                if assignment is None:
+                    break  # 无解或被中止：回溯已穷尽时再试也不会有结果
+                yield from self._improve(assignment, rng, deadline)
+        finally:
+            if self.stats:
+                self.stats.flush()
+
+    def _offer(self, scorer, assignment):
+        """交给 TopK；分数低于目前最好的方案时返回 (分数, 布局副本)，否则返回 None"""
+        score = scorer.score
+        self.top.offer(score, tuple(scorer.grid), list(assignment))
+        if self.best_score is None or score < self.best_score:
+            self.best_score = score
+            return score, list(assignment)
+        return None
+
+    def _improve(self, assignment, rng, deadline):
+        """从合法布局出发做保持合法的下降搜索，沿途的布局都交给 TopK，产出其中的新最好方案"""
+        grid = [EMPTY if idx is None else self.types[idx] for idx in assignment]
+        evaluator = IncrementalEvaluator(grid, self.graph)
+        scorer = SoftScorer(grid, self.graph, self.weights)
+        seats = len(assignment)
+        better = self._offer(scorer, assignment)
+        if better:
+            yield better
+        for step in range(self.IMPROVE_STEPS):
+            if step % 256 == 0 and (time.monotonic() >= deadline or self._stopped()):
+                break
+            a, b = rng.randrange(seats), rng.randrange(seats)
+            if scorer.grid[a] == scorer.grid[b]:
+                continue
+            if self.stats:
+                self.stats.generated += 1
+                self.stats.validated += 1
+            if evaluator.swap_delta(a, b) > 0:
+                if self.stats and evaluator.last_rule is not None:
+                    self.stats.reject(evaluator.last_rule)
+                continue
+            delta = scorer.swap(a, b)
+            if delta > 0:
+                scorer.swap(a, b)
+                continue
+            evaluator.swap(a, b)
+            assignment[a], assignment[b] = assignment[b], assignment[a]
+            if self.top.admits(scorer.score):
+                better = self._offer(scorer, assignment)
+                if better:
+                    yield better
@@ -0,0 +1,267 @@
+# server.py
+"""局域网排座服务：多位老师共用一台机器的进程池排座（只用标准库，可完全离线运行）
+
+用法示例：
+    python server.py --port 8765 --workers 4
+
+接口（请求和响应均为 JSON）：
+    POST /jobs              提交任务：{"students": [{"name", "type"}, ...], "mode": "backtrack",
+                            "seed": 0, "time_limit": 30, "room": {...}}，room 可省略（格式见 room.py）；
+                            与排队中或运行中的任务完全相同时返回已有任务（"deduplicated": true）
+    GET  /jobs              所有任务的状态
+    GET  /jobs/<id>         单个任务的状态
+    GET  /jobs/<id>/result  任务结果（座位表、种子、统计），未完成时返回 409
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from room import RoomMap
+from service import ClassroomService
+
+# 服务端支持的排列模式（枚举和随机抽样会再开进程池，不适合放进共享进程池）
+MODES = ('backtrack', 'anneal', 'best')
+# 请求体大小上限（字节）
+MAX_BODY = 1 << 20
+# 最多保留多少个已结束的任务
+MAX_FINISHED_JOBS = 1000
+
+
+def run_job(students, room, mode, seed, time_limit):
+    """在工作进程中执行一个任务，返回可 JSON 序列化的结果；无解或超时抛出异常"""
+    service = ClassroomService()
+    service.load_students(students)
+    if room is not None:
+        service.set_room(RoomMap.from_dict(room))
+    timer = threading.Timer(time_limit, service.stop_event.set)
+    timer.start()
+    try:
+        result = service.arrange(seed, 1, lambda value: None, lambda message: None,
+                                 mode=mode, time_limit=time_limit)
+    finally:
+        timer.cancel()
+    if result is None:
+        raise ValueError("未找到有效排列（无解或超时）")
+    result = dict(result, stats=service.get_stats_snapshot())
+    result['stats'].pop('workers', None)
+    return result
+
+
+class HttpError(Exception):
+    """以指定状态码返回给客户端的错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Job:
+    """一个排座任务及其状态：queued → running → done / failed"""
+
+    __slots__ = ('id', 'key', 'request', 'status', 'submitted', 'started', 'finished',
+                 'result', 'error')
+
+    def __init__(self, key, request):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.request = request
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def describe(self):
+        return {'id': self.id, 'status': self.status, 'mode': self.request['mode'],
+                'students': len(self.request['students']), 'submitted': self.submitted,
+                'started': self.started, 'finished': self.finished, 'error': self.error}
+
+
+class JobServer:
+    """把任务排队到共享进程池：同时最多运行 workers 个任务，每个任务有自己的时间上限"""
+
+    def __init__(self, workers=None, max_time_limit=120.0):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_time_limit = max_time_limit
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.jobs = OrderedDict()   # id → Job，按提交顺序
+        self.active = {}            # 请求键 → 排队中或运行中的 Job，用于合并相同的请求
+        self._slots = None          # asyncio.Semaphore，在事件循环中创建
+
+    # 任务管理
+    def parse_request(self, body):
+        """检查并规范化提交的任务，返回 (请求键, 请求)"""
+        try:
+            data = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"无效的JSON格式：{e}")
+        if isinstance(data, list):
+            data = {'students': data}
+        if not isinstance(data, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "请求必须是对象或学生数组")
+        try:
+            request = {
+                'students': data.get('students'),
+                'mode': data.get('mode', 'backtrack'),
+                'seed': int(data.get('seed', 0)),
+                'time_limit': min(float(data.get('time_limit', 30.0)), self.max_time_limit),
+                'room': data.get('room'),
+            }
+            ClassroomService().load_students(request['students'])
+            if request['room'] is not None:
+                RoomMap.from_dict(request['room'])
+        except (TypeError, ValueError, KeyError, AttributeError) as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        if request['mode'] not in MODES:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"排列模式必须是 {'/'.join(MODES)} 之一")
+        if request['time_limit'] <= 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "时间上限必须为正数")
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest(), request
+
+    def submit(self, body):
+        """提交任务；与排队中或运行中的任务相同时直接返回那个任务"""
+        key, request = self.parse_request(body)
+        job = self.active.get(key)
+        if job is not None:
+            return dict(job.describe(), deduplicated=True)
+        job = Job(key, request)
+        self.jobs[job.id] = job
+        self.active[key] = job
+        asyncio.get_running_loop().create_task(self._run(job))
+        self._prune()
+        return dict(job.describe(), deduplicated=False)
+
+    async def _run(self, job):
+        async with self._slots:
+            job.status = 'running'
+            job.started = time.time()
+            request = job.request
+            try:
+                job.result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, run_job, request['students'], request['room'],
+                    request['mode'], request['seed'], request['time_limit'])
+                job.status = 'done'
+            except Exception as e:
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.finished = time.time()
+                self.active.pop(job.key, None)
+
+    def _prune(self):
+        """只保留最近 MAX_FINISHED_JOBS 个已结束的任务"""
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"任务不存在：{job_id}")
+        return job
+
+    # HTTP
+    def route(self, method, path, body):
+        """分发请求，返回 (状态码, 响应对象)"""
+        parts = [part for part in path.split('/') if part]
+        if parts == ['jobs']:
+            if method == 'POST':
+                return HTTPStatus.ACCEPTED, self.submit(body)
+            if method == 'GET':
+                return HTTPStatus.OK, {'jobs': [job.describe() for job in self.jobs.values()]}
+        elif len(parts) == 2 and parts[0] == 'jobs' and method == 'GET':
+            return HTTPStatus.OK, self._job(parts[1]).describe()
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'result' and method == 'GET':
+            job = self._job(parts[1])
+            if job.status == 'failed':
+                raise HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, job.error)
+            if job.status != 'done':
+                raise HttpError(HTTPStatus.CONFLICT, f"任务尚未完成（{job.status}）")
+            return HTTPStatus.OK, dict(job.result, id=job.id)
+        else:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"未知的路径：{path}")
+        raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"不支持的方法：{method}")
+
+    async def handle(self, reader, writer):
+        """处理一个 HTTP/1.1 连接（每个连接一个请求）"""
+        try:
+            try:
+                method, target, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY:
+                    raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "请求体过大")
+                body = await reader.readexactly(length) if length else b''
+                status, payload = self.route(method.upper(), urlsplit(target).path, body)
+            except HttpError as e:
+                status, payload = e.status, {'error': str(e)}
+            except (ValueError, asyncio.IncompleteReadError):
+                status, payload = HTTPStatus.BAD_REQUEST, {'error': "无效的HTTP请求"}
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                         f"Content-Type: application/json; charset=utf-8\r\n"
+                         f"Content-Length: {len(data)}\r\n"
+                         f"Connection: close\r\n\r\n".encode('latin-1') + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        self._slots = asyncio.Semaphore(self.workers)
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"排座服务已启动：http://{host}:{port}/jobs（{self.workers} 个工作进程）", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="局域网排座服务（多位老师共用一个进程池）")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="监听地址，局域网共享时使用 0.0.0.0")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="同时运行的任务数（进程数）")
+    parser.add_argument('--max-time-limit', type=float, default=120.0,
+                        help="每个任务的时间上限（秒），请求中更大的值会被截断")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = JobServer(args.workers, args.max_time_limit)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
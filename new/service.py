@@ -1,225 +1,516 @@
 # service.py
 import math
+import os
 import random
 import json
-import numpy as np
-from threading import Event, Lock
-from itertools import permutations, islice
-from queue import Queue
+import time
+from threading import Event, Lock, Thread, Timer
+
+from ranking import unrank_permutation
+from roster import Roster
+
+# 依赖 numpy 的模块（座位图、求解引擎、验证器）在第一次用到时才在方法内导入，
+# 界面启动时只加载名单管理所需的模块
 
 class ClassroomService:
+    # 自动选择矩形布局时允许的最大长宽比
+    MAX_ASPECT = 1.5
+    # 按用时报告进度的间隔（秒）
+    PROGRESS_INTERVAL = 0.2
+    # portfolio 模式默认同时运行的引擎（按历史胜出次数重新排序，进程多于引擎时从头重复）
+    PORTFOLIO = ('random', 'backtrack', 'anneal')
+    # portfolio 模式的胜出记录（见 engines.PortfolioHistory）
+    PORTFOLIO_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     'portfolio_history.jsonl')
+
     def __init__(self):
-        self.students = []
+        self.students = Roster()
         self.current_result = None
         self.stop_event = Event()
         self.best_solution = None
+        self.stats = None  # 最近一次搜索的 SearchStats，可随时调用 get_stats_snapshot 读取
         self.solution_lock = Lock()  # 修正：导入Lock类
+        self.room = None  # 自定义座位图（RoomMap），None 时按人数自动选择矩形
+        self.history_path = self.PORTFOLIO_HISTORY  # 为 None 时不记录胜出引擎
 
     def calculate_layout_size(self, student_count):
-        """智能计算最小合适布局尺寸"""
+        """为没有座位图的班级选择矩形布局 (行数, 列数)：layout_candidates 中的第一个"""
         if student_count == 0:
             return 0, 0
+        return self.layout_candidates(student_count)[0]
 
-        # 寻找最接近正方形的布局
-        min_size = math.ceil(math.sqrt(student_count))
+    def layout_candidates(self, student_count):
+        """可选的矩形布局 (行数, 列数)，按优先顺序排列
 
-        # 优先选择接近黄金分割的比例
+        长宽比不超过 MAX_ASPECT、座位数不超过 ceil(√n)² 的矩形按空座位从少到多、
+        再按接近正方形的程度排序，最后是原来的 ceil(√n)×ceil(√n) 正方形。
+        质数人数因此不会得到 1×n 这样的细长布局。
+        """
+        size = math.ceil(math.sqrt(student_count))
         candidates = []
-        for w in range(min_size, min_size + 3):
-            for h in range(min_size, min_size + 3):
-                if w * h >= student_count:
-                    ratio = max(w / h, h / w)
-                    candidates.append((ratio, w, h))
-
-        # 选择最接近1:1的比例
-        candidates.sort()
-        return candidates[0][1], candidates[0][2]
+        for rows in range(1, size + 1):
+            for cols in range(max(rows, math.ceil(student_count / rows)), size * size // rows + 1):
+                ratio = cols / rows
+                if ratio <= self.MAX_ASPECT and (rows, cols) != (size, size):
+                    candidates.append((rows * cols - student_count, ratio, rows, cols))
+        return [(rows, cols) for _, _, rows, cols in sorted(candidates)] + [(size, size)]
+
+    def set_room(self, room):
+        """设置自定义座位图（room.RoomMap），None 表示按人数自动选择矩形"""
+        self.room = room
+
+    def load_room(self, filepath):
+        """从 JSON 文件读取座位图"""
+        from room import RoomMap
+
+        try:
+            self.room = RoomMap.load(filepath)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"无效的JSON格式：{str(e)}")
+        except Exception as e:
+            raise ValueError(f"座位图加载失败：{str(e)}")
+        return self.room
+
+    def room_for(self, types):
+        """本次排列使用的座位图：自定义座位图，或按人数选择的矩形
+
+        没有自定义座位图时依次尝试 layout_candidates，使用第一个通过可行性检查的矩形；
+        都不通过时使用座位最多的正方形（由 arrange 报告无解原因）。
+        """
+        from feasibility import check_feasibility
+        from room import RoomMap
+
+        if self.room is not None:
+            return self.room
+        candidates = self.layout_candidates(len(types))
+        for rows, cols in candidates:
+            room = RoomMap.rectangle(rows, cols)
+            if not check_feasibility(types, room.compile()):
+                return room
+        return RoomMap.rectangle(*candidates[-1])
+
     # 学生管理方法
     def add_student(self, name, student_type):
         """添加学生验证（增强版）"""
         if not name:
             raise ValueError("姓名不能为空")
-        if any(s['name'].lower() == name.lower() for s in self.students):
+        if name in self.students:
             raise ValueError("学生姓名不能重复")
         if student_type not in (1, 0, -1, -2):
             raise ValueError("无效的学生类型")
-        self.students.append({'name': name, 'type': student_type})
+        self.students.append(name, student_type)
+
+    def add_students(self, students):
+        """批量添加学生（[{'name', 'type'}, ...]），一次检查全部数据
+
+        姓名与已有学生或本批中前面的学生重复（忽略大小写）也视为错误。
+        有任何错误时一名都不添加，抛出的 ValueError 中逐行列出所有错误。
+        """
+        errors = []
+        batch = []
+        seen = set()
+        for index, item in enumerate(students, 1):
+            if not isinstance(item, dict):
+                errors.append(f"第{index}条数据不是对象")
+                continue
+            if not {'name', 'type'}.issubset(item.keys()):
+                errors.append(f"第{index}条数据缺少必要字段")
+                continue
+            name, student_type = item['name'], item['type']
+            if not isinstance(name, str) or not name.strip():
+                errors.append(f"第{index}条姓名无效")
+                continue
+            key = Roster.name_key(name)
+            if name in self.students or key in seen:
+                errors.append(f"第{index}条姓名重复：{name}")
+            if student_type not in (1, 0, -1, -2):
+                errors.append(f"第{index}条类型无效")
+            seen.add(key)
+            batch.append((name, student_type))
+        if errors:
+            raise ValueError("\n".join(errors))
+        self.students.extend(batch)
+        return len(batch)
 
     def load_from_json(self, filepath):
         """JSON加载（增强验证）"""
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-
-            if not isinstance(data, list):
-                raise ValueError("JSON根元素必须是数组")
-
-            required_fields = {'name', 'type'}
-            for index, item in enumerate(data):
-                if not isinstance(item, dict):
-                    raise ValueError(f"第{index + 1}条数据不是对象")
-                if not required_fields.issubset(item.keys()):
-                    raise ValueError(f"第{index + 1}条数据缺少必要字段")
-                if not isinstance(item['name'], str) or not item['name'].strip():
-                    raise ValueError(f"第{index + 1}条姓名无效")
-                if item['type'] not in (1, 0, -1, -2):
-                    raise ValueError(f"第{index + 1}条类型无效")
-
-            self.students = data
+            self.load_students(data)
         except json.JSONDecodeError as e:
             raise ValueError(f"无效的JSON格式：{str(e)}")
         except Exception as e:
             raise ValueError(f"加载失败：{str(e)}")
 
-    def _convert_to_seating_chart(self, layout):
-        """转换布局为行列结构"""
-        chart = []
-        for row in layout:
-            chart_row = []
-            for seat in row:
-                chart_row.append({
-                    'name': seat['name'] if seat else "空",
-                    'type': seat['type'] if seat else None
-                })
-            chart.append(chart_row)
-        return chart
+    def load_students(self, data):
+        """从已解析的 JSON 数据（[{'name', 'type'}, ...]）载入名单，替换当前名单
+
+        格式错误或姓名重复时抛出 ValueError（列出所有错误），当前名单保持不变。
+        """
+        if not isinstance(data, list):
+            raise ValueError("JSON根元素必须是数组")
+        previous = self.students
+        self.students = Roster()
+        try:
+            self.add_students(data)
+        except ValueError:
+            self.students = previous
+            raise
+
+    def _convert_to_seating_chart(self, roster, assignment, graph):
+        """将座位→学生索引列表转换为行列结构（只在这里解析姓名），不可用位置为 None"""
+        seats = []
+        for idx in assignment:
+            if idx is None:
+                seats.append({'name': '空座位', 'type': None})
+            else:
+                seats.append({'name': roster.names[idx], 'type': roster.types[idx]})
+        return graph.to_grid(seats, None)
 
     # 核心排列算法
-    def arrange(self, seed, thread_num, progress_callback, log_callback):
-        """优化后的穷举算法"""
+    def arrange(self, seed, thread_num, progress_callback, log_callback, mode='backtrack',
+                time_limit=30.0, top_k=5, max_attempts=None, engines=None):
+        """排列入口：mode 为 backtrack/seed/pattern/empty/random/anneal/best/portfolio 之一，
+        所有模式都在 time_limit 秒后停止（各模式见 _solve_* 和 parallel.solve_in_processes）"""
+        from feasibility import check_feasibility
+        from parallel import solve_in_processes
+        from stats import SearchStats
+
         self.stop_event.clear()
+        self.best_solution = None
+        finished = Event()
+        # 所有模式都在 time_limit 秒后停止（多进程模式由 stop_event 同步到共享停止标志）
+        deadline = Timer(time_limit, self.stop_event.set)
+        deadline.daemon = True
         try:
-            students = self.students.copy()
-            n = len(students)
-            if n == 0:
+            roster = self.students.copy()
+            if not roster:
                 raise ValueError("没有可排列的学生数据")
-
-            # 计算布局尺寸
-            size = math.ceil(math.sqrt(n))
-            total_seats = size * size
-            required_empty = total_seats - n
-
-            # 生成所有可能的空座位组合
-            all_positions = list(range(total_seats))
-            empty_positions = set()
-
-            # 创建任务队列
-            task_queue = Queue()
-            batch_size = 1000
-
-            # 生成排列批次
-            def generate_permutations():
-                while not self.stop_event.is_set():
-                    # 随机生成空座位组合
-                    empty = set(random.sample(all_positions, required_empty))
-                    if empty not in empty_positions:
-                        empty_positions.add(frozenset(empty))
-                        yield empty
-
-                    # 随机打乱学生顺序
-                    shuffled = random.sample(students, n)
-                    yield shuffled
-
-            # 创建工作线程
-            workers = []
-            for _ in range(thread_num):
-                t = threading.Thread(
-                    target=self._arrangement_worker,
-                    args=(generate_permutations(), size, progress_callback),
-                    daemon=True
-                )
-                workers.append(t)
-                t.start()
-
-            # 等待结果
-            while not self.stop_event.is_set():
-                if self.best_solution:
-                    self.stop_event.set()
-                    break
-                time.sleep(0.1)
-
-            # 清理线程
-            for t in workers:
-                t.join()
-
+            if mode not in ('backtrack', 'seed', 'pattern', 'empty', 'random', 'anneal', 'best',
+                            'portfolio'):
+                raise ValueError(f"未知的排列模式：{mode}")
+
+            types = roster.types
+            room = self.room_for(types)
+            graph = room.compile()
+            failures = check_feasibility(types, graph)
+            if failures:
+                raise ValueError("名单无解：" + "；".join(f['message'] for f in failures))
+            in_process = mode in ('anneal', 'best') or (mode == 'backtrack' and thread_num <= 1)
+            if mode == 'portfolio':
+                entries = self._portfolio_entries(types, seed, thread_num, engines)
+                self.stats = SearchStats(len(entries))
+            else:
+                self.stats = SearchStats(1 if in_process else thread_num)
+            started = time.perf_counter()
+            deadline.start()
+            if mode not in ('seed', 'pattern', 'empty'):
+                Thread(target=self._report_elapsed,
+                       args=(progress_callback, time_limit, finished), daemon=True).start()
+
+            if mode == 'best':
+                return self._solve_best(roster, graph, seed, time_limit, top_k, max_attempts,
+                                        log_callback)
+
+            violations = 0
+            engine = None
+            if mode == 'portfolio':
+                found, engine = self._solve_portfolio(types, room, entries, time_limit,
+                                                      log_callback)
+            elif mode == 'anneal':
+                found, violations = self._solve_anneal(types, graph, seed, time_limit, log_callback)
+            elif mode == 'backtrack' and thread_num <= 1:
+                found = self._solve_backtrack(types, graph, seed, log_callback)
+            else:
+                log_callback(f"启动 {thread_num} 个进程并行搜索")
+                found = solve_in_processes(types, room, mode, seed, thread_num,
+                                           stop_event=self.stop_event, stats=self.stats,
+                                           progress=progress_callback, time_limit=time_limit)
+            if found is None:
+                if time.perf_counter() - started >= time_limit:
+                    log_callback(f"已达到时间上限 {time_limit:g} 秒，搜索停止")
+                return None
+
+            found_seed, assignment = found
+            self.best_solution = {
+                'seed': found_seed,
+                'layout': self._convert_to_seating_chart(roster, assignment, graph),
+                'violations': violations
+            }
+            if engine is not None:
+                self.best_solution['engine'] = engine
             return self.best_solution
 
         except Exception as e:
             raise ServiceError(f"排列失败: {str(e)}")
         finally:
+            deadline.cancel()
+            finished.set()
             self.stop_event.set()
 
-    def _arrangement_worker(self, permutation_generator, size, progress_callback):
-        """工作线程处理函数"""
+    def _portfolio_entries(self, types, seed, thread_num, engines):
+        """组合中每个进程的 (引擎名, 求解函数, 种子, 是否完备)
+
+        默认组合按历史上相近规模名单的胜出次数排序，进程多于引擎时从排在前面的引擎
+        开始重复；种子为 seed、seed+1、...（对 n! 取模）。
+        """
+        from engines import PortfolioHistory, get_engine
+
+        names = list(engines or self.PORTFOLIO)
+        if not names:
+            raise ValueError("组合中至少需要一个引擎")
+        if engines is None and self.history_path:
+            names = PortfolioHistory(self.history_path).ranked(names, len(types))
+        limit = math.factorial(len(types))
+        entries = []
+        for i in range(max(thread_num, len(names))):
+            engine = get_engine(names[i % len(names)])
+            entries.append((engine.name, engine.solve, (seed + i) % limit, engine.complete))
+        return entries
+
+    def _solve_portfolio(self, types, room, entries, time_limit, log_callback):
+        """多个引擎同时搜索，返回 ((种子, 座位→学生索引列表), 胜出的引擎名)
+
+        结果中的 'engine' 为胜出的引擎，用该引擎和种子单独运行可复现同一布局；
+        每次比赛的结果追加到 history_path（见 engines.PortfolioHistory）。
+        """
+        from engines import PortfolioHistory
+        from parallel import race_engines
+
+        names = [name for name, _, _, _ in entries]
+        log_callback(f"启动 {len(entries)} 个进程同时运行：{'、'.join(names)}")
+        started = time.perf_counter()
+        won = race_engines(types, room, entries, time_limit, stop_event=self.stop_event,
+                           stats=self.stats)
+        elapsed = time.perf_counter() - started
+        if self.history_path:
+            try:
+                PortfolioHistory(self.history_path).record(
+                    types, room.seat_count, names, won and won[0], elapsed)
+            except OSError as e:
+                log_callback(f"胜出记录写入失败：{e}")
+        if won is None:
+            return None, None
+        engine, found_seed, assignment = won
+        log_callback(f"{engine} 引擎最先找到布局（种子 {found_seed}，用时 {elapsed:.2f} 秒）")
+        return (found_seed, assignment), engine
+
+    def _report_elapsed(self, progress_callback, time_limit, finished):
+        """无法计数的搜索按已用时间占时间上限的比例报告进度，直到 finished 被设置"""
+        started = time.perf_counter()
+        while not finished.wait(self.PROGRESS_INTERVAL):
+            progress_callback(min(99.0, (time.perf_counter() - started) * 100 / time_limit))
+
+    def _solve_backtrack(self, types, graph, seed, log_callback):
+        """单进程回溯搜索：按 -2、-1、1 的顺序逐个放置并前向检查，用同一种子可复现同一布局"""
+        from solver import BacktrackingSolver
+
+        solver = BacktrackingSolver(types, graph, stop_event=self.stop_event,
+                                    stats=self.stats.worker(0))
+        assignment = solver.solve(random.Random(seed))
+        log_callback(f"回溯搜索完成，共尝试 {solver.nodes} 个节点")
+        if assignment is None:
+            return None
+        return seed, assignment
+
+    def _solve_best(self, roster, graph, seed, time_limit, top_k, max_attempts, log_callback):
+        """在预算内搜索多个合法布局，保留软约束分数最低的 top_k 个
+
+        结果为分数最低的方案，另加 'score'（见 scoring）和按分数排列的 'solutions'。
+        """
+        from scoring import BestLayoutSearch
+
+        search = BestLayoutSearch(roster.types, graph, k=top_k, stop_event=self.stop_event,
+                                  stats=self.stats.worker(0))
+        ranked = search.run(random.Random(seed), time_limit=time_limit, max_attempts=max_attempts)
+        log_callback(f"优选搜索完成，回溯 {search.attempts} 次，保留 {len(ranked)} 个方案")
+        return self._keep_ranked(roster, graph, seed, ranked)
+
+    def _keep_ranked(self, roster, graph, seed, ranked):
+        """把按分数排列的 [(分数, 布局)] 保存为 best_solution（第一个方案 + 'solutions'）"""
+        if not ranked:
+            return None
+        solutions = [self._scored_solution(roster, graph, seed, score, assignment)
+                     for score, assignment in ranked]
+        self.best_solution = dict(solutions[0], solutions=solutions)
+        return self.best_solution
+
+    def _scored_solution(self, roster, graph, seed, score, assignment):
+        return {'seed': seed,
+                'layout': self._convert_to_seating_chart(roster, assignment, graph),
+                'violations': 0,
+                'score': score}
+
+    def stream_arrangement(self, seed, time_limit=10.0, max_attempts=None, top_k=5,
+                           progress_callback=None):
+        """边搜索边产出越来越好的方案（生成器），搜索方式与 best 模式相同
+
+        每项为 {'seed', 'layout', 'violations', 'score', 'elapsed'}，elapsed 为从开始到
+        找到该方案的秒数；第一个合法布局找到后立即产出。调用方停止迭代或设置
+        stop_event 都会结束搜索，结束后 best_solution 与 best 模式的结果相同。
+        """
+        from feasibility import check_feasibility
+        from scoring import BestLayoutSearch
+        from stats import SearchStats
+
+        self.stop_event.clear()
+        self.best_solution = None
+        finished = Event()
+        roster = self.students.copy()
         try:
-            for attempt, candidates in enumerate(permutation_generator):
-                if self.stop_event.is_set():
-                    return
+            if not roster:
+                raise ServiceError("没有可排列的学生数据")
+            types = roster.types
+            graph = self.room_for(types).compile()
+            failures = check_feasibility(types, graph)
+            if failures:
+                raise ServiceError("名单无解：" + "；".join(f['message'] for f in failures))
+            self.stats = SearchStats(1)
+            if progress_callback is not None:
+                Thread(target=self._report_elapsed,
+                       args=(progress_callback, time_limit, finished), daemon=True).start()
+
+            search = BestLayoutSearch(types, graph, k=top_k, stop_event=self.stop_event,
+                                      stats=self.stats.worker(0))
+            started = time.perf_counter()
+            try:
+                for score, assignment in search.improvements(random.Random(seed), time_limit,
+                                                              max_attempts):
+                    solution = self._scored_solution(roster, graph, seed, score, assignment)
+                    solution['elapsed'] = time.perf_counter() - started
+                    yield solution
+            finally:
+                self._keep_ranked(roster, graph, seed, search.top.items())
+        finally:
+            finished.set()
+            self.stop_event.set()
+
+    async def astream_arrangement(self, seed, **kwargs):
+        """stream_arrangement 的异步迭代器版本：搜索在线程中运行，不阻塞事件循环"""
+        import asyncio
 
-                # 生成布局
-                if isinstance(candidates, set):  # 处理空座位
-                    layout = self._create_layout_with_empty(size, candidates)
-                else:  # 处理学生排列
-                    layout = self._arrange_students(candidates, size)
-
-                # 验证布局
-                if self._validate_full_layout(layout):
-                    with self.solution_lock:
-                        if not self.best_solution:
-                            self.best_solution = {
-                                'seed': random.randint(0, 2 ** 32),
-                                'layout': self._convert_to_seating_chart(layout)
-                            }
-                            self.stop_event.set()
+        stream = self.stream_arrangement(seed, **kwargs)
+        done = object()
+        try:
+            while True:
+                solution = await asyncio.to_thread(next, stream, done)
+                if solution is done:
                     return
+                yield solution
+        finally:
+            # 提前退出时通知搜索停止，生成器在线程结束当前步骤后被回收
+            self.stop_event.set()
+
+    def _solve_anneal(self, types, graph, seed, time_limit, log_callback):
+        """模拟退火搜索，返回 ((种子, 座位→学生索引列表), 剩余违规座位数)
+
+        最多运行 time_limit 秒，超时返回冲突最少的布局（结果中的 'violations' 不为0）。
+        """
+        from anneal import AnnealingSolver
+
+        solver = AnnealingSolver(types, graph, stop_event=self.stop_event,
+                                 stats=self.stats.worker(0))
+        assignment, violations = solver.solve(random.Random(seed), time_limit=time_limit)
+        log_callback(f"模拟退火完成，迭代 {solver.iterations} 次，重启 {solver.restarts} 次")
+        return (seed, assignment), violations
+
+    def arrange_rotation(self, weeks, seed, log_callback, time_limit=30.0, adjacency='row'):
+        """生成一个学期 weeks 周的轮换座位表，整个学期内尽量不与同一个人第二次相邻
+
+        第一周用回溯搜索（人数较多无解时改用模拟退火），之后每周从上一周的布局出发
+        局部调整（见 rotation.RotationPlanner）。adjacency 为 'row'（同一排左右相邻）
+        或 'square'（周围一圈）。返回 [{'week', 'layout', 'repeats'}, ...]，repeats 为
+        本周与以前重复相邻的学生对数；超时或被中止时返回已生成的周。
+        """
+        from feasibility import check_feasibility
+        from rotation import ADJACENCY, RotationPlanner
+        from stats import SearchStats
 
-                # 更新进度
-                if attempt % 100 == 0:
-                    progress_callback(min(attempt / 1000 * 100, 99))
+        self.stop_event.clear()
+        self.best_solution = None
+        try:
+            roster = self.students.copy()
+            if not roster:
+                raise ValueError("没有可排列的学生数据")
+            if weeks < 1:
+                raise ValueError("周数必须为正整数")
+            if adjacency not in ADJACENCY:
+                raise ValueError(f"相邻定义必须是 {'/'.join(ADJACENCY)} 之一")
+
+            types = roster.types
+            graph = self.room_for(types).compile()
+            failures = check_feasibility(types, graph)
+            if failures:
+                raise ValueError("名单无解：" + "；".join(f['message'] for f in failures))
+            self.stats = SearchStats(1)
+            started = time.perf_counter()
+            found = self._solve_backtrack(types, graph, seed, log_callback)
+            if found is None:
+                found, violations = self._solve_anneal(types, graph, seed, time_limit, log_callback)
+                if violations:
+                    return None
+
+            planner = RotationPlanner(types, graph, adjacency, stop_event=self.stop_event,
+                                      stats=self.stats.worker(0))
+            remaining = time_limit - (time.perf_counter() - started)
+            schedule = planner.plan(found[1], weeks, random.Random(seed), remaining)
+            repeats = sum(r for _, r in schedule)
+            log_callback(f"轮换排座完成：{len(schedule)}/{weeks} 周，重复相邻 {repeats} 对，"
+                         f"用时 {time.perf_counter() - started:.2f} 秒")
+            return [{'week': week, 'layout': self._convert_to_seating_chart(roster, assignment, graph),
+                     'repeats': r}
+                    for week, (assignment, r) in enumerate(schedule, 1)]
 
         except Exception as e:
-            print(f"工作线程错误: {str(e)}")
+            raise ServiceError(f"轮换排座失败: {str(e)}")
+        finally:
+            self.stop_event.set()
 
-    # 辅助方法
-    def _find_valid_position(self, layout, size, student):
-        """为问题学生寻找合适位置"""
-        for _ in range(100):
-            i, j = random.randint(0,size-1), random.randint(0,size-1)
-            if layout[i,j] is None and self._validate_position(layout, size, i, j, student):
-                return (i,j)
-        raise RuntimeError("无法找到合适位置")
-
-    def _validate_position(self, layout, size, i, j, student):
-        """验证位置有效性"""
-        if student['type'] == -1:
-            neighbors = self._get_neighbors(layout, size, i, j, 1)
-            return all(n['type'] == 0 if n else True for n in neighbors)
-        elif student['type'] == -2:
-            neighbors = self._get_neighbors(layout, size, i, j, 2)
-            return (any(n['type'] == 1 for n in neighbors if n) and
-                    all(n['type'] == 0 if n else True for n in neighbors))
-        return True
-
-    def _place_good_student(self, layout, size):
-        """放置好学生"""
-        for _ in range(100):
-            i, j = random.randint(0,size-1), random.randint(0,size-1)
-            if layout[i,j] is None:
-                neighbors = self._get_neighbors(layout, size, i, j, 1)
-                if any(n and n['type'] in (-1,-2) for n in neighbors):
-                    return (i,j)
-        return self._find_valid_position(layout, size, {'type': 1})
-
-    def _get_neighbors(self, layout, size, i, j, distance):
-        """获取周围邻居"""
-        neighbors = []
-        for dx in (-distance, 0, distance):
-            for dy in (-distance, 0, distance):
-                x, y = i+dx, j+dy
-                if 0 <= x < size and 0 <= y < size:
-                    neighbors.append(layout[x,y])
-        return neighbors
+    def analyze_feasibility(self):
+        """不搜索、只用计数上界检查当前名单是否一定无解，返回未通过的上界列表（见 feasibility）"""
+        from feasibility import check_feasibility
+
+        types = self.students.types
+        if not types:
+            return []
+        return check_feasibility(types, self.room_for(types).compile())
 
+    def get_stats_snapshot(self):
+        """读取当前（或最近一次）搜索的统计快照，没有搜索过时返回 None"""
+        return self.stats.snapshot() if self.stats else None
+
+    def layout_from_seed(self, seed):
+        """由种子复现 seed 模式的布局：学生按排列顺序依次就座，空座位在最后"""
+        n = len(self.students)
+        graph = self.room_for(self.students.types).compile()
+        assignment = unrank_permutation(seed, n) + [None] * (graph.seat_count - n)
+        return self._convert_to_seating_chart(self.students, assignment, graph)
+
+    def layout_from_pattern(self, seed):
+        """由种子复现 pattern 模式的布局：先解码类型图案，再按种子把同类型学生打乱就座"""
+        from patterns import assign_students, unrank_pattern
+
+        types = self.students.types
+        graph = self.room_for(types).compile()
+        pattern = unrank_pattern(seed, types, graph.seat_count)
+        assignment = assign_students(pattern, types, seed)
+        return self._convert_to_seating_chart(self.students, assignment, graph)
+
+    def layout_from_empty(self, seed):
+        """由种子复现 empty 模式的布局：种子按组合数系统解码为空座位子集，再用同一种子回溯"""
+        from ranking import unrank_combination
+        from solver import BacktrackingSolver
+
+        types = self.students.types
+        graph = self.room_for(types).compile()
+        empty = unrank_combination(seed, graph.seat_count, graph.seat_count - len(types))
+        assignment = BacktrackingSolver(types, graph).solve(random.Random(seed), empty)
+        if assignment is None:
+            return None
+        return self._convert_to_seating_chart(self.students, assignment, graph)
+
+    # 辅助方法
     def get_layout_preview(self, layout):
         """生成表格预览数据"""
         preview = []
@@ -229,69 +520,6 @@ class ClassroomService:
             preview.append(preview_row)
         return preview
 
-    def _create_layout_with_empty(self, size, empty_positions):
-        """创建带空座位的布局"""
-        layout = np.full((size, size), None, dtype=object)
-        for pos in empty_positions:
-            row = pos // size
-            col = pos % size
-            layout[row][col] = {'name': '空座位', 'type': None}
-        return layout
-
-    def _arrange_students(self, students, size):
-        """将学生填入布局"""
-        layout = np.full((size, size), None, dtype=object)
-        student_iter = iter(students)
-        for i in range(size):
-            for j in range(size):
-                if layout[i][j] is None:
-                    try:
-                        layout[i][j] = next(student_iter)
-                    except StopIteration:
-                        pass
-        return layout
-
-    def _validate_full_layout(self, layout):
-        """完整验证布局"""
-        size = layout.shape[0]
-        for i in range(size):
-            for j in range(size):
-                student = layout[i][j]
-                if student and student['type'] is not None:
-                    if not self._validate_student(layout, i, j):
-                        return False
-        return True
-
-    def _validate_student(self, layout, row, col):
-        """验证单个学生位置"""
-        student = layout[row][col]
-        if student['type'] < 0:
-            # 检查附近是否有同类型学生
-            neighbors = self._get_neighbors(layout, row, col,
-                                            distance=2 if student['type'] == -2 else 1)
-            if any(n and n['type'] == student['type'] for n in neighbors):
-                return False
-
-            # 检查是否有好学生管理
-            if student['type'] == -2:
-                has_good = any(n and n['type'] == 1 for n in neighbors)
-                if not has_good:
-                    return False
-        return True
-
-    def _get_neighbors(self, layout, row, col, distance=1):
-        """获取周围邻居（优化版）"""
-        size = layout.shape[0]
-        neighbors = []
-        for dx in range(-distance, distance + 1):
-            for dy in range(-distance, distance + 1):
-                if dx == 0 and dy == 0:
-                    continue
-                x, y = row + dx, col + dy
-                if 0 <= x < size and 0 <= y < size:
-                    neighbors.append(layout[x][y])
-        return neighbors
-
     def get_max_seed(self):
         """安全计算排列数"""
         n = len(self.students)
@@ -300,6 +528,35 @@ class ClassroomService:
         except OverflowError:
             return None
 
+    def get_pattern_count(self):
+        """不同类型图案的数量（pattern 模式的种子上限）"""
+        from patterns import pattern_total
+
+        types = self.students.types
+        return pattern_total(types, self.room_for(types).seat_count)
+
+    def get_empty_subset_count(self):
+        """空座位子集的数量（empty 模式的种子上限）"""
+        from parallel import empty_subset_total
+
+        types = self.students.types
+        return empty_subset_total(types, self.room_for(types).seat_count)
+
+    @staticmethod
+    def register_engine(name, solve, complete=False):
+        """注册可在 portfolio 模式中使用的引擎（见 engines.register_engine）"""
+        from engines import register_engine
+
+        register_engine(name, solve, complete)
+
+    @staticmethod
+    def engine_names():
+        """已注册的引擎名称"""
+        from engines import engine_names
+
+        return engine_names()
+
+
 class ServiceError(Exception):
     """自定义服务异常"""
     pass
@@ -0,0 +1,241 @@
+# solver.py
+import random
+from time import perf_counter
+
+from stats import TALK_ADJACENT, SERIOUS_NEARBY, SERIOUS_UNSUPERVISED
+
+
+class BacktrackingSolver:
+    """回溯求解器：逐个放置学生，只检查新放置学生影响到的约束
+
+    规则与 validator.seat_rule_masks 一致：
+    -1 学生周围1格内不能有其他 -1；
+    -2 学生周围2格内不能有其他 -2，且周围2格内必须有好学生(1)。
+
+    规则只与类型有关，同类型的学生可以互换，因此实际搜索的是类型图案：
+    某个座位对一名学生已回溯失败后，同类型的后续学生不再尝试该座位
+    （对称性约简，不影响座位的启发式顺序），姓名由种子打乱后的放置顺序决定。
+    """
+
+    # 约束越强越先放置：-2 → -1 → 1，0 和空座位最后直接填充
+    TYPE_ORDER = (-2, -1, 1)
+
+    # 每放置多少个节点把统计写入共享内存一次
+    FLUSH_EVERY = 256
+
+    def __init__(self, types, graph, stop_event=None, stats=None):
+        self.types = list(types)
+        self.graph = graph  # room.SeatGraph，座位编号即图中可用座位的编号
+        self.seat_count = graph.seat_count
+        if len(self.types) > self.seat_count:
+            raise ValueError("座位数量不足")
+        self.stop_event = stop_event
+        self.stats = stats  # 可选的 WorkerStats，为 None 时不做任何计时和计数
+        self.failed_rule = None
+        self.near1 = graph.near1.lists
+        self.near2 = graph.near2.lists
+        self.nodes = 0
+
+    def solve(self, rng=None, empty=()):
+        """求解，返回 每个座位对应的学生索引列表（None 表示空座位），无解或被中止返回 None
+
+        empty 为必须留空的座位（例如按组合序号枚举的空座位子集），学生只放在其余座位上。
+        """
+        rng = rng or random.Random()
+        self._reset()
+        for seat in empty:
+            self.closed[seat] = True
+            for q in self.near2[seat]:
+                self.free2[q] -= 1
+
+        order = []
+        for t in self.TYPE_ORDER:
+            group = [i for i, st in enumerate(self.types) if st == t]
+            rng.shuffle(group)
+            order.extend(group)
+        self.order = order
+        self.remaining = {t: sum(1 for st in self.types if st == t) for t in self.TYPE_ORDER}
+
+        found = self._search(0, rng)
+        if self.stats:
+            self.stats.flush()
+        if not found:
+            return None
+
+        # 剩余的普通学生和空座位不会破坏任何约束，随机填入
+        rest = [i for i, st in enumerate(self.types) if st not in self.TYPE_ORDER]
+        free = [s for s in range(self.seat_count)
+                if self.seat_of[s] is None and not self.closed[s]]
+        rng.shuffle(free)
+        for seat, idx in zip(free, rest):
+            self.seat_of[seat] = idx
+        return list(self.seat_of)
+
+    def _reset(self):
+        n = self.seat_count
+        self.seat_of = [None] * n
+        self.block1 = [0] * n    # 周围1格内 -1 学生数
+        self.block2 = [0] * n    # 周围2格内 -2 学生数
+        self.support = [0] * n   # 周围2格内好学生数
+        self.free2 = [len(self.near2[s]) for s in range(n)]  # 周围2格内空闲座位数
+        self.tabu = {t: [False] * n for t in self.TYPE_ORDER}  # 已对同类型学生失败的座位
+        self.closed = [False] * n  # 必须留空的座位
+        self.unsupervised = 0    # 尚无好学生管理的 -2 学生数
+        self.nodes = 0
+
+    def _stopped(self):
+        return self.stop_event is not None and self.stop_event.is_set()
+
+    def _search(self, depth, rng):
+        """按顺序放置第 depth 个受约束学生"""
+        if depth == len(self.order):
+            return self.unsupervised == 0
+        if self._stopped():
+            return False
+
+        idx = self.order[depth]
+        t = self.types[idx]
+        stats = self.stats
+        if stats:
+            started = perf_counter()
+        candidates = self._candidates(t, rng)
+        if stats:
+            stats.generation_seconds += perf_counter() - started
+            stats.generated += len(candidates)
+
+        # 同类型的下一名学生不必再尝试本层已失败的座位：互换两人得到的是同一图案
+        same_next = depth + 1 < len(self.order) and self.types[self.order[depth + 1]] == t
+        tabu = self.tabu[t]
+        failed = []
+        found = False
+        for seat in candidates:
+            self.nodes += 1
+            if stats:
+                started = perf_counter()
+            self._place(seat, idx, t)
+            ok = self._forward_check(seat, t)
+            if stats:
+                stats.validation_seconds += perf_counter() - started
+                stats.validated += 1
+                if not ok:
+                    stats.reject(self.failed_rule)
+                if self.nodes % self.FLUSH_EVERY == 0:
+                    stats.flush()
+            if ok and self._search(depth + 1, rng):
+                found = True
+                break
+            self._remove(seat, idx, t)
+            if self._stopped():
+                break
+            if same_next:
+                tabu[seat] = True
+                failed.append(seat)
+        for seat in failed:
+            tabu[seat] = False
+        return found
+
+    def _candidates(self, t, rng):
+        """当前学生可选的座位（已按启发式排序）"""
+        tabu = self.tabu[t]
+        free = [s for s in range(self.seat_count)
+                if self.seat_of[s] is None and not self.closed[s] and not tabu[s]]
+        rng.shuffle(free)
+        # 问题学生优先选择封锁其他可用座位最少的位置，便于紧凑排布
+        if t == -2:
+            seats = [s for s in free
+                     if self.block2[s] == 0 and (self.support[s] > 0 or self.free2[s] > 0)]
+            if self.stats:
+                nearby = sum(1 for s in free if self.block2[s])
+                self.stats.reject(SERIOUS_NEARBY, nearby)
+                self.stats.reject(SERIOUS_UNSUPERVISED, len(free) - len(seats) - nearby)
+            return sorted(seats, key=lambda s: self._blocked_count(self.near2[s], self.block2))
+        if t == -1:
+            seats = [s for s in free if self.block1[s] == 0]
+            if self.stats:
+                self.stats.reject(TALK_ADJACENT, len(free) - len(seats))
+            return sorted(seats, key=lambda s: self._blocked_count(self.near1[s], self.block1))
+        # 好学生优先放在能管到更多无人管理的 -2 学生的位置
+        return sorted(free, key=self._uncovered_near, reverse=True)
+
+    def _blocked_count(self, near, block):
+        """放在此处会新封锁的可用座位数"""
+        return sum(1 for q in near
+                   if self.seat_of[q] is None and not self.closed[q] and block[q] == 0)
+
+    def _uncovered_near(self, seat):
+        return sum(1 for q in self.near2[seat]
+                   if self.seat_of[q] is not None
+                   and self.types[self.seat_of[q]] == -2 and self.support[q] == 0)
+
+    def _place(self, seat, idx, t):
+        self.seat_of[seat] = idx
+        self.remaining[t] -= 1
+        for q in self.near2[seat]:
+            self.free2[q] -= 1
+        if t == -2:
+            for q in self.near2[seat]:
+                self.block2[q] += 1
+            if self.support[seat] == 0:
+                self.unsupervised += 1
+        elif t == -1:
+            for q in self.near1[seat]:
+                self.block1[q] += 1
+        elif t == 1:
+            for q in self.near2[seat]:
+                self.support[q] += 1
+                if self.support[q] == 1 and self._type_at(q) == -2:
+                    self.unsupervised -= 1
+
+    def _remove(self, seat, idx, t):
+        self.seat_of[seat] = None
+        self.remaining[t] += 1
+        for q in self.near2[seat]:
+            self.free2[q] += 1
+        if t == -2:
+            for q in self.near2[seat]:
+                self.block2[q] -= 1
+            if self.support[seat] == 0:
+                self.unsupervised -= 1
+        elif t == -1:
+            for q in self.near1[seat]:
+                self.block1[q] -= 1
+        elif t == 1:
+            for q in self.near2[seat]:
+                self.support[q] -= 1
+                if self.support[q] == 0 and self._type_at(q) == -2:
+                    self.unsupervised += 1
+
+    def _type_at(self, seat):
+        idx = self.seat_of[seat]
+        return None if idx is None else self.types[idx]
+
+    def _forward_check(self, seat, t):
+        """前向检查：只检查受新放置学生影响的约束，失败时在 failed_rule 中记录原因"""
+        # 周围无人管理的 -2 学生必须还有空位留给好学生
+        self.failed_rule = SERIOUS_UNSUPERVISED
+        if t != 1:
+            for q in self.near2[seat]:
+                if self._type_at(q) == -2 and self.support[q] == 0 and self.free2[q] == 0:
+                    return False
+        if t == -2 and self.support[seat] == 0 and self.free2[seat] == 0:
+            return False
+        # 好学生已用完但仍有 -2 无人管理
+        if self.unsupervised > 0 and self.remaining[1] == 0:
+            return False
+        # 剩余受限学生必须还有足够的可用座位
+        if t == -2 and self.remaining[-2] > 0:
+            self.failed_rule = SERIOUS_NEARBY
+            available = sum(1 for s in range(self.seat_count)
+                            if self.seat_of[s] is None and self.block2[s] == 0
+                            and not self.closed[s] and not self.tabu[-2][s])
+            if available < self.remaining[-2]:
+                return False
+        if t == -1 and self.remaining[-1] > 0:
+            self.failed_rule = TALK_ADJACENT
+            available = sum(1 for s in range(self.seat_count)
+                            if self.seat_of[s] is None and self.block1[s] == 0
+                            and not self.closed[s] and not self.tabu[-1][s])
+            if available < self.remaining[-1]:
+                return False
+        self.failed_rule = None
+        return True
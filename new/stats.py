@@ -0,0 +1,91 @@
+# stats.py
+import time
+
+# 拒绝原因（与 validator.rule_masks 的键一致）
+RULES = ('talk_adjacent', 'serious_nearby', 'serious_unsupervised')
+TALK_ADJACENT, SERIOUS_NEARBY, SERIOUS_UNSUPERVISED = range(len(RULES))
+RULE_LABELS = {
+    'talk_adjacent': "-1 与 -1 相邻",
+    'serious_nearby': "-2 两格内有其他 -2",
+    'serious_unsupervised': "-2 两格内没有好学生",
+}
+
+# 共享数组中每个工作者一行的字段
+FIELDS = ('generated', 'validated') + RULES + ('generation_seconds', 'validation_seconds')
+_WIDTH = len(FIELDS)
+
+
+class WorkerStats:
+    """单个工作者的计数器：先在本地累加，flush 时写入共享数组中自己的那一行
+
+    每行只有一个写入者，因此不需要加锁；读取方最多看到上一次 flush 的数值。
+    """
+
+    def __init__(self, array, index):
+        self._array = array
+        self._offset = index * _WIDTH
+        self.generated = 0
+        self.validated = 0
+        self.rejections = [0] * len(RULES)
+        self.generation_seconds = 0.0
+        self.validation_seconds = 0.0
+
+    def reject(self, rule, count=1):
+        self.rejections[rule] += count
+
+    def flush(self):
+        values = (self.generated, self.validated, *self.rejections,
+                  self.generation_seconds, self.validation_seconds)
+        self._array[self._offset:self._offset + _WIDTH] = values
+
+
+class SearchStats:
+    """一次搜索的统计：每个工作者（线程或进程）一行，存放在共享内存中
+
+    worker(i) 返回第 i 个工作者的计数器；snapshot() 随时读取汇总，开销很小，
+    供 Controller 日志和命令行定期轮询。
+    """
+
+    def __init__(self, workers=1, ctx=None):
+        if ctx is None:
+            import multiprocessing  # 只在真正开始搜索时加载
+            ctx = multiprocessing.get_context()
+        self.workers = workers
+        self.array = ctx.RawArray('d', workers * _WIDTH)
+        self.started = time.perf_counter()
+
+    def worker(self, index):
+        return WorkerStats(self.array, index)
+
+    def snapshot(self):
+        """返回当前统计：总数、每秒速率、按规则的拒绝数以及每个工作者的明细"""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        rows = [self._row(i, elapsed) for i in range(self.workers)]
+        total = {field: sum(row[field] for row in rows)
+                 for field in ('generated', 'validated', 'generation_seconds', 'validation_seconds')}
+        total['rejections'] = {rule: sum(row['rejections'][rule] for row in rows) for rule in RULES}
+        total['generated_per_sec'] = total['generated'] / elapsed
+        total['validated_per_sec'] = total['validated'] / elapsed
+        total['elapsed'] = elapsed
+        total['workers'] = rows
+        return total
+
+    def _row(self, index, elapsed):
+        values = self.array[index * _WIDTH:(index + 1) * _WIDTH]
+        row = dict(zip(FIELDS, values))
+        row['generated'] = int(row['generated'])
+        row['validated'] = int(row['validated'])
+        row['rejections'] = {rule: int(row.pop(rule)) for rule in RULES}
+        row['generated_per_sec'] = row['generated'] / elapsed
+        row['validated_per_sec'] = row['validated'] / elapsed
+        return row
+
+
+def format_snapshot(snapshot):
+    """把统计快照格式化为一行日志"""
+    rejections = "，".join(f"{RULE_LABELS[rule]} {count}"
+                          for rule, count in snapshot['rejections'].items())
+    return (f"候选 {snapshot['generated']}（{snapshot['generated_per_sec']:.0f}/秒），"
+            f"已验证 {snapshot['validated']}（{snapshot['validated_per_sec']:.0f}/秒），"
+            f"生成 {snapshot['generation_seconds']:.2f}秒 / 验证 {snapshot['validation_seconds']:.2f}秒；"
+            f"拒绝：{rejections}")
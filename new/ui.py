@@ -52,6 +52,9 @@ class WinGUI(Tk):
         self.tk_button_m8bgba2z = self.__tk_button_m8bgba2z( self.tk_tabs_m8acommq_1)
         self.tk_label_m8bmucgz = self.__tk_label_m8bmucgz( self.tk_tabs_m8acommq_2)
         self.tk_button_save = self.__tk_button_save_students(self.tk_tabs_m8acommq_1)
+        self.tk_button_room = self.__tk_button_room(self.tk_tabs_m8acommq_0)
+        self.tk_check_best = self.__tk_check_best(self.tk_tabs_m8acommq_0)
+        self.tk_select_solution = self.__tk_select_solution(self.tk_tabs_m8acommq_0)
 
     def __win(self):
         self.title("教室排序助手")
@@ -154,13 +157,26 @@ class WinGUI(Tk):
         btn = Button(parent, text="保存学生", takefocus=False)
         btn.place(x=200, y=440, width=80, height=30)
         return btn
+    def __tk_button_room(self, parent):
+        btn = Button(parent, text="座位图", takefocus=False)
+        btn.place(x=281, y=0, width=80, height=30)
+        return btn
+    def __tk_check_best(self, parent):
+        self.tk_check_best_var = BooleanVar(value=False)
+        check = Checkbutton(parent, text="优选方案", variable=self.tk_check_best_var, takefocus=False)
+        check.place(x=281, y=39, width=90, height=30)
+        return check
+    def __tk_select_solution(self, parent):
+        combo = Combobox(parent, state="readonly")
+        combo.place(x=330, y=180, width=160, height=22)
+        return combo
     def __tk_label_m8b9092q(self,parent):
         label = Label(parent,text="线程数",anchor="center", )
         label.place(x=0, y=39, width=248, height=30)
         return label
     def __tk_progressbar_m8b910ks(self,parent):
         progressbar = Progressbar(parent, orient=HORIZONTAL,)
-        progressbar.place(x=0, y=153, width=595, height=30)
+        progressbar.place(x=0, y=153, width=595, height=24)
         return progressbar
     def __tk_label_m8b918w9(self,parent):
         label = Label(parent,text="进度",anchor="center", )
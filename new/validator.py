@@ -0,0 +1,96 @@
+# validator.py
+import numpy as np
+
+from room import rectangle_graph
+
+# 类型网格中空座位的编码（学生类型为 1/0/-1/-2）
+EMPTY = 9
+
+
+def type_grid(layout):
+    """将字典布局（dtype=object）转换为 int8 类型网格（不可用位置同空座位）"""
+    rows, cols = len(layout), len(layout[0])
+    grid = np.full((rows, cols), EMPTY, dtype=np.int8)
+    for i in range(rows):
+        for j in range(cols):
+            seat = layout[i][j]
+            if seat and seat['type'] is not None:
+                grid[i, j] = seat['type']
+    return grid
+
+
+def neighbor_counts(mask, table):
+    """统计每个座位周围（不含自身）为 True 的数量
+
+    mask 形状为 (K, 座位数)，table 为座位图的邻居表，整批一次完成。
+    """
+    return table.count(mask.astype(np.int16))
+
+
+def seat_rule_masks(values, graph):
+    """按规则返回违规座位掩码，values 形状为 (K, 座位数)，按座位图 graph 的编号排列"""
+    talk = values == -1
+    serious = values == -2
+    good = values == 1
+    return {
+        'talk_adjacent': talk & (neighbor_counts(talk, graph.near1) > 0),
+        'serious_nearby': serious & (neighbor_counts(serious, graph.near2) > 0),
+        'serious_unsupervised': serious & (neighbor_counts(good, graph.near2) == 0),
+    }
+
+
+def rule_masks(grids):
+    """按规则返回违规座位掩码，grids 形状为 (K, rows, cols)（完整矩形网格）"""
+    k, rows, cols = grids.shape
+    masks = seat_rule_masks(grids.reshape(k, rows * cols), rectangle_graph(rows, cols))
+    return {rule: mask.reshape(k, rows, cols) for rule, mask in masks.items()}
+
+
+def validate_seats(values, graph):
+    """批量验证按座位图编号排列的类型，values 形状为 (座位数,) 或 (K, 座位数)
+
+    返回 (valid, violations)，含义与 validate_grids 相同。
+    """
+    values = np.asarray(values, dtype=np.int8)
+    single = values.ndim == 1
+    if single:
+        values = values[np.newaxis]
+
+    masks = seat_rule_masks(values, graph)
+    violations = masks['talk_adjacent'] | masks['serious_nearby'] | masks['serious_unsupervised']
+    valid = ~violations.any(axis=1)
+
+    if single:
+        return bool(valid[0]), violations[0]
+    return valid, violations
+
+
+def validate_grids(grids):
+    """批量验证类型网格
+
+    grids 可以是单个 (rows, cols) 网格，也可以是堆叠的 (K, rows, cols) 批量网格。
+    返回 (valid, violations)：valid 为布尔值（批量时为形状 (K,) 的数组），
+    violations 为与输入同形状的逐座位违规掩码。
+    """
+    grids = np.asarray(grids, dtype=np.int8)
+    single = grids.ndim == 2
+    if single:
+        grids = grids[np.newaxis]
+
+    k, rows, cols = grids.shape
+    valid, violations = validate_seats(grids.reshape(k, rows * cols), rectangle_graph(rows, cols))
+    violations = violations.reshape(k, rows, cols)
+
+    if single:
+        return bool(valid[0]), violations[0]
+    return valid, violations
+
+
+def rule_rejections(values, graph):
+    """批量验证 (K, 座位数) 的类型，并按规则统计被拒绝的候选数
+
+    返回 (valid, counts)：valid 为形状 (K,) 的布尔数组，counts 为 {规则: 违反该规则的候选数}。
+    """
+    per_rule = {rule: mask.any(axis=1) for rule, mask in seat_rule_masks(values, graph).items()}
+    rejected = per_rule['talk_adjacent'] | per_rule['serious_nearby'] | per_rule['serious_unsupervised']
+    return ~rejected, {rule: int(hit.sum()) for rule, hit in per_rule.items()}
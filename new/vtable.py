@@ -0,0 +1,117 @@
+# vtable.py
+from tkinter.ttk import Scrollbar, Style
+
+
+class VirtualTable:
+    """虚拟化的 Treeview：只创建可见的几十行，滚动时复用这些行显示其他数据
+
+    数据由调用方提供：row_count() 返回总行数，row_values(i) 返回第 i 行的值。
+    数据变化后调用 refresh()，代价只与可见行数有关，与总行数无关；
+    因此几千行的名单和座位表也能即时刷新和滚动。
+    """
+
+    # 还没有行可以测量、主题也没有设置 rowheight 时使用的估计值（像素）
+    ROW_HEIGHT = 20
+    HEADER_HEIGHT = 24
+
+    def __init__(self, tree, row_count, row_values):
+        self.tree = tree
+        self.row_count = row_count
+        self.row_values = row_values
+        self.first = 0  # 第一行可见数据的下标
+        self.scrollbar = self._create_scrollbar()
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            tree.bind(sequence, self._on_wheel)
+
+    def _create_scrollbar(self):
+        """在表格右侧放一个由本类控制的滚动条"""
+        bar = Scrollbar(self.tree.master, command=self._on_scroll)
+        info = self.tree.place_info()
+        if info:
+            x, y = int(info['x']) + int(info['width']), int(info['y'])
+            bar.place(x=x, y=y, height=int(info['height']), anchor='ne')
+        return bar
+
+    def _metrics(self):
+        """(表头高度, 行高)：优先测量第一行的实际位置，其次读取主题的 rowheight
+
+        行高随主题和 Windows 的 DPI 缩放变化，不能写死。
+        """
+        items = self.tree.get_children()
+        box = self.tree.bbox(items[0]) if items else None
+        if box:
+            _, y, _, height = box
+            return y, height
+        try:
+            row = int(Style(self.tree).lookup('Treeview', 'rowheight'))
+        except (TypeError, ValueError):
+            row = self.ROW_HEIGHT
+        return self.HEADER_HEIGHT, row
+
+    @property
+    def visible(self):
+        """表格能显示的行数"""
+        info = self.tree.place_info()
+        height = int(info['height']) if info else self.tree.winfo_height()
+        header, row = self._metrics()
+        return max(1, (height - header) // max(1, row))
+
+    def refresh(self):
+        """按当前数据重绘可见行（行数变化时增删 Treeview 中的行）
+
+        第一次插入行之前只能估计行高，插入后按实测行高算出的可见行数不同时再画一次。
+        """
+        visible = self.visible
+        self._draw(visible)
+        measured = self.visible
+        if measured != visible:
+            self._draw(measured)
+
+    def _draw(self, visible):
+        count = self.row_count()
+        self.first = max(0, min(self.first, count - visible))
+        shown = min(visible, count - self.first)
+        items = list(self.tree.get_children())
+        if len(items) > shown:
+            self.tree.delete(*items[shown:])
+            items = items[:shown]
+        for offset in range(shown):
+            values = self.row_values(self.first + offset)
+            if offset < len(items):
+                self.tree.item(items[offset], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+        if count:
+            self.scrollbar.set(self.first / count, (self.first + shown) / count)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def update_row(self, index):
+        """只更新第 index 行（不可见时什么也不做）"""
+        offset = index - self.first
+        items = self.tree.get_children()
+        if 0 <= offset < len(items):
+            self.tree.item(items[offset], values=self.row_values(index))
+
+    def scroll_to(self, first):
+        """滚动使第 first 行成为第一个可见行"""
+        self.first = max(0, first)
+        self.refresh()
+
+    def scroll_to_end(self):
+        self.scroll_to(self.row_count() - self.visible)
+
+    def _on_scroll(self, action, amount, unit=None):
+        """滚动条回调：('moveto', 比例) 或 ('scroll', 步数, 'units'/'pages')"""
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * self.row_count()))
+        elif action == 'scroll':
+            step = self.visible if unit == 'pages' else 1
+            self.scroll_to(self.first + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.first - 3)
+        else:
+            self.scroll_to(self.first + 3)
+        return 'break'